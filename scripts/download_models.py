@@ -5,59 +5,191 @@ Downloads all validated ComfyUI models to the specified directory.
 
 Features:
 - Parallel downloads with ThreadPoolExecutor
-- SHA256 checksum verification
+- SHA256 checksum verification (BLAKE3 when the manifest provides it)
 - Resume capability with HTTP Range headers
+- Segmented multi-connection downloads via aria2c (when installed)
 - Progress bars with tqdm
 - Exponential backoff retry logic
 """
 
 import os
+import ctypes
+import errno
 import json
+import random
+import re
 import requests
+from requests.adapters import HTTPAdapter
+import urllib3
+from urllib3.util.retry import Retry
+import shutil
+import subprocess
+import threading
 import time
 import sys
 import hashlib
+import mmap
+from operator import itemgetter
+from contextlib import nullcontext
+from dataclasses import dataclass
 from pathlib import Path
 from urllib.parse import urlparse
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, FIRST_EXCEPTION, ThreadPoolExecutor, wait
 from typing import Optional, Dict, List, Tuple
 from tqdm import tqdm
 
+# Progress bars are only shared between threads, so a plain RLock is enough; it avoids
+# tqdm creating a multiprocessing semaphore (which needs /dev/shm) on first use
+tqdm.set_lock(threading.RLock())
+
+# orjson parses large JSON files several times faster than the stdlib
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# BLAKE3 hashes several times faster than SHA256 and uses multiple cores on large files
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
 # Constants
-PROGRESS_REPORT_INTERVAL_MB = 10  # Report progress every 10 MB
 RETRY_BASE_DELAY_SECONDS = 5  # Base delay for exponential backoff
+RETRY_MAX_DELAY_SECONDS = 60  # Upper bound for a single backoff wait
+# Errors worth retrying a download for. Copying response.raw bypasses requests, so a
+# connection dropped mid-body surfaces as a urllib3 or socket error, not a requests one
+DOWNLOAD_RETRY_ERRORS = (requests.exceptions.RequestException, urllib3.exceptions.HTTPError, OSError)
 MIB_TO_BYTES = 1024 * 1024  # Bytes in one mebibyte (binary megabyte)
 KB_TO_BYTES = 1024  # Bytes in one kilobyte
+DOWNLOAD_CHUNK_SIZE = MIB_TO_BYTES  # Copy buffer size for streaming downloads to disk
+HASH_CHUNK_SIZE = MIB_TO_BYTES  # Read size for checksums on Python < 3.11
+MODEL_FILE_EXTENSIONS = (".safetensors", ".ckpt", ".pth", ".bin", ".pt")
+MODEL_SUBDIRS = (  # Category folders created under ComfyUI/models
+    "checkpoints",
+    "unet",
+    "vae",
+    "clip",
+    "t5",
+    "clip_vision",
+    "controlnet",
+    "loras",
+    "upscale_models",
+    "diffusion_models",
+    "animatediff_models",
+    "text_encoders",
+    "ipadapter",
+)
+CHECKSUM_CACHE_FILE = ".model_checksums.json"  # Verified hashes kept next to the models
 MIN_VALID_FILE_SIZE_KB = (
     10  # Minimum file size in KB to consider a download complete (10KB for small LoRAs)
 )
-MAX_WORKERS = int(os.getenv("DOWNLOAD_MAX_WORKERS", "4"))  # Parallel download workers
-
-# Model classification mapping: ordered from most specific to most general
-MODEL_CLASSIFICATION_MAPPING = [
-    ("unet", ["flux", "sd3", "auraflow", "hunyuan", "kolors", "lumina"]),
-    ("vae", ["vae", "kl-f8-anime"]),
-    ("clip_vision", ["clip_vision", "image_encoder"]),
-    ("clip", ["clip", "open_clip"]),
-    ("t5", ["t5", "umt5"]),
-    ("controlnet", ["controlnet", "control_", "canny", "depth", "openpose", "scribble"]),
-    ("loras", ["lora", ".lora"]),
-    ("upscale_models", ["esrgan", "realesrgan", "swinir", "4x", "2x", "upscale"]),
-    ("animatediff_models", ["animatediff", "mm_", "motion"]),
-    ("ipadapter", ["ip-adapter", "ip_adapter"]),
-    ("text_encoders", ["text_encoder"]),
-    ("checkpoints", [".ckpt", ".safetensors"]),
-]
+MAX_WORKERS = int(os.getenv("DOWNLOAD_MAX_WORKERS", "16"))  # Parallel download workers
+# Connections per file; aria2c rejects values outside 1-16
+ARIA2C_CONNECTIONS = min(max(int(os.getenv("DOWNLOAD_ARIA2C_CONNECTIONS", "16")), 1), 16)
+# Use aria2c for segmented multi-connection downloads when installed
+ARIA2C_PATH = (
+    shutil.which("aria2c") if os.getenv("DOWNLOAD_USE_ARIA2C", "true").lower() == "true" else None
+)
+ARIA2C_CONTROL_SUFFIX = ".aria2"  # aria2c keeps this next to a file until it is complete
+# Without aria2c, large files are fetched as this many concurrent byte ranges
+RANGED_DOWNLOAD_PARTS = int(os.getenv("DOWNLOAD_RANGED_PARTS", "8"))
+RANGED_DOWNLOAD_MIN_SIZE = 256 * MIB_TO_BYTES  # Smaller files are not worth splitting
+RANGED_STATE_SAVE_INTERVAL = 5  # Seconds between saves of ranged download progress
+# Hosts whose connection pools the session keeps: Hugging Face redirects to CDN and
+# storage hosts, and a few models come from other sites
+HTTP_POOL_HOSTS = 16
+
+HF_TOKEN = (os.getenv("HF_TOKEN") or "").strip() or None
+HF_HOSTS = ("huggingface.co", "hf.co")  # The token is only ever sent to these and their subdomains
+
+# fallocate(2) with FALLOC_FL_KEEP_SIZE reserves disk blocks without growing the file,
+# unlike os.posix_fallocate, so a partial download still resumes from its real size
+FALLOC_FL_KEEP_SIZE = 0x01
+try:
+    _libc_fallocate = ctypes.CDLL(None, use_errno=True).fallocate
+    _libc_fallocate.argtypes = (ctypes.c_int, ctypes.c_int, ctypes.c_longlong, ctypes.c_longlong)
+except (OSError, AttributeError):
+    _libc_fallocate = None
+
+# Model classification mapping: ordered from most specific to most general.
+# Patterns starting with "." are file extensions, all others are substrings.
+MODEL_CLASSIFICATION_MAPPING = (
+    ("unet", ("flux", "sd3", "auraflow", "hunyuan", "kolors", "lumina")),
+    ("vae", ("vae", "kl-f8-anime")),
+    ("clip_vision", ("clip_vision", "image_encoder")),
+    ("clip", ("clip", "open_clip")),
+    ("t5", ("t5", "umt5")),
+    ("controlnet", ("controlnet", "control_", "canny", "depth", "openpose", "scribble")),
+    ("loras", ("lora", ".lora")),
+    ("upscale_models", ("esrgan", "realesrgan", "swinir", "4x", "2x", "upscale")),
+    ("animatediff_models", ("animatediff", "mm_", "motion")),
+    ("ipadapter", ("ip-adapter", "ip_adapter")),
+    ("text_encoders", ("text_encoder",)),
+    ("checkpoints", (".ckpt", ".safetensors")),
+)
+
+
+def compile_classifier(mapping) -> "re.Pattern":
+    """
+    Compile the classification mapping into a single regex.
+
+    Each directory becomes a named lookahead branch, and branches are tried in
+    mapping order, so the first (most specific) matching directory wins.
+    """
+    branches = []
+    for directory, patterns in mapping:
+        extensions = tuple(p for p in patterns if p.startswith("."))
+        substrings = tuple(p for p in patterns if not p.startswith("."))
+        alternatives = [re.escape(s) for s in substrings]
+        alternatives += [re.escape(ext) + "$" for ext in extensions]
+        branches.append(f"(?P<{directory}>(?=.*(?:{'|'.join(alternatives)})))")
+    return re.compile("|".join(branches), re.DOTALL)
+
+
+MODEL_CLASSIFIER = compile_classifier(MODEL_CLASSIFICATION_MAPPING)
+
+
+class RangeNotHonouredError(requests.exceptions.RequestException):
+    """The server answered a byte-range request with something other than that range."""
+
+
+class CappedRetry(Retry):
+    """urllib3 Retry that honours Retry-After but never sleeps longer than RETRY_MAX_DELAY_SECONDS."""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, RETRY_MAX_DELAY_SECONDS)
 
 
 def setup_hf_session():
     """Set up a requests.Session with Hugging Face token if available."""
     session = requests.Session()
     session.headers.update({"User-Agent": "ComfyUI-Model-Downloader/2.0"})
-    hf_token = os.getenv("HF_TOKEN")
-    if hf_token:
-        session.headers["Authorization"] = f"Bearer {hf_token.strip()}"
-    else:
+    # Model weights do not compress, so ask for the raw bytes instead of gzip
+    session.headers["Accept-Encoding"] = "identity"
+    # urllib3 retries connection errors and throttling/5xx responses (honouring Retry-After)
+    # before any body is read; failures mid-stream are resumed by download_file_with_resume
+    retries = CappedRetry(
+        total=5,
+        backoff_factor=1,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("HEAD", "GET"),
+        respect_retry_after_header=True,
+    )
+    # Keep one warm keep-alive connection per worker and host, so parallel downloads
+    # reuse TLS sessions instead of urllib3 discarding connections beyond its default pool.
+    # Ranged downloads open up to RANGED_DOWNLOAD_PARTS connections per worker.
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_HOSTS,
+        pool_maxsize=max(MAX_WORKERS * max(RANGED_DOWNLOAD_PARTS, 1), 10),
+        max_retries=retries,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if not HF_TOKEN:
         print("⚠️  No HF_TOKEN set. Protected Hugging Face downloads may fail.")
     return session
 
@@ -65,41 +197,304 @@ def setup_hf_session():
 SESSION = setup_hf_session()
 
 
-def verify_checksum(file_path: Path, expected_sha256: str) -> bool:
+def log(message: str = ""):
+    """
+    Print a status line from any download or verification thread.
+
+    tqdm.write emits the whole line in a single write under tqdm's lock and
+    redraws active progress bars, so lines from parallel workers neither
+    interleave nor tear the shared progress bar.
+    """
+    tqdm.write(message)
+
+
+def auth_headers(url: str) -> Dict[str, str]:
+    """Return the Authorization header for Hugging Face URLs, and nothing for other hosts."""
+    host = urlparse(url).hostname or ""
+    if HF_TOKEN and (host in HF_HOSTS or host.endswith(tuple("." + h for h in HF_HOSTS))):
+        return {"Authorization": f"Bearer {HF_TOKEN}"}
+    return {}
+
+
+def filename_from_url(url: str) -> str:
+    """Return the file name of a URL, ignoring query parameters."""
+    path = urlparse(url.split("?")[0]).path
+    return path.split("/")[-1] if path else "unknown"
+
+
+def classify_model_file(filename: str) -> str:
+    """Return the models subdirectory a file belongs in, based on its name."""
+    # Single pass over the filename with the precompiled classification regex
+    match = MODEL_CLASSIFIER.match(filename.lower())
+    if match:
+        return match.lastgroup
+
+    # Default fallback
+    return "diffusion_models"
+
+
+@dataclass(slots=True)
+class DownloadJob:
+    """A model download with its URL parsed once up front."""
+
+    url: str
+    filename: str
+    target_path: Path
+    checksum: Optional[str] = None
+    existing_size: int = 0
+    interrupted: bool = False  # An aria2c control file says the download is unfinished
+
+
+def iter_model_files(directory):
+    """Recursively yield os.DirEntry objects for model files below directory."""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_model_files(entry.path)
+            elif entry.name.endswith(MODEL_FILE_EXTENSIONS):
+                yield entry
+
+
+class HashingWriter:
+    """Write-only file wrapper that feeds each chunk to a hash and a progress callback."""
+
+    __slots__ = ("file", "hasher", "callback")
+
+    def __init__(self, file, hasher, callback):
+        self.file = file
+        self.hasher = hasher
+        self.callback = callback
+
+    def write(self, data):
+        if self.hasher is not None:
+            self.hasher.update(data)
+        self.callback(len(data))
+        return self.file.write(data)
+
+
+def existing_file_sizes(directory) -> Dict[str, int]:
+    """Map file name to size for the regular files directly inside directory."""
+    try:
+        with os.scandir(directory) as entries:
+            return {
+                entry.name: entry.stat().st_size
+                for entry in entries
+                if entry.is_file()
+            }
+    except FileNotFoundError:
+        return {}
+
+
+def reserve_disk_space(fd: int, offset: int, length: int):
+    """
+    Reserve contiguous space for the remaining bytes of a download.
+
+    Allocating the whole file up front avoids extent fragmentation and makes
+    a full disk fail before the download starts instead of gigabytes in.
+
+    Raises:
+        OSError: If there is not enough free space on the device
+    """
+    if _libc_fallocate is None or length <= 0:
+        return
+    if _libc_fallocate(fd, FALLOC_FL_KEEP_SIZE, offset, length) != 0:
+        err = ctypes.get_errno()
+        if err in (errno.ENOSPC, errno.EDQUOT):
+            raise OSError(err, os.strerror(err))
+        # Filesystems without fallocate support simply allocate as data arrives
+
+
+def unfinished_bytes(ranges) -> int:
+    """Bytes still missing from a list of [next offset, last byte] ranges."""
+    return sum(max(end + 1 - offset, 0) for offset, end in ranges)
+
+
+def load_ranged_state(state_path: Path, part_path: Path, url: str, total_size: int) -> Optional[List[List[int]]]:
+    """
+    Return the saved ranges of an interrupted ranged download, or None.
+
+    The state only counts if the ".part" file is still there and the state
+    was written for the same URL and file size.
+    """
+    if not part_path.exists():
+        return None
+    try:
+        state = load_json_file(state_path)
+        if state["url"] != url or state["size"] != total_size:
+            return None
+        ranges = [[int(offset), int(end)] for offset, end in state["ranges"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if not ranges or ranges[-1][1] != total_size - 1:
+        return None
+    return ranges
+
+
+def retry_delay(previous_delay: float, response: Optional[requests.Response] = None) -> float:
+    """
+    Return how long to wait before the next download attempt.
+
+    Honours a Retry-After header given in seconds; otherwise uses
+    decorrelated-jitter backoff so parallel workers that failed together
+    do not all retry at the same moment.
+    """
+    retry_after = response.headers.get("retry-after", "") if response is not None else ""
+    if retry_after.isdigit():
+        return min(float(retry_after), RETRY_MAX_DELAY_SECONDS)
+    upper = min(RETRY_MAX_DELAY_SECONDS, previous_delay * 3)
+    return random.uniform(RETRY_BASE_DELAY_SECONDS, max(upper, RETRY_BASE_DELAY_SECONDS))
+
+
+def drop_page_cache(file_path: Path):
+    """
+    Flush a finished download to disk and evict it from the page cache.
+
+    Multi-GB model files would otherwise push everything else out of the
+    page cache while they are written. This is best effort and a no-op on
+    platforms without posix_fadvise.
     """
-    Verify SHA256 checksum of a file.
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            # Dirty pages are not dropped, so write them back first
+            os.fdatasync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+def load_json_file(path):
+    """
+    Parse a JSON file, using orjson when it is installed.
+
+    Both parsers raise json.JSONDecodeError (orjson's error subclasses it)
+    so callers handle malformed files the same way either way.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(Path(path).read_bytes())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def dump_json_file(path, data):
+    """Write data as indented UTF-8 JSON, using orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        Path(path).write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def parse_content_range(content_range: str) -> Optional[Tuple[int, int]]:
+    """
+    Parse a "bytes <start>-<end>/<total>" Content-Range header.
+
+    Args:
+        content_range: Value of the Content-Range response header
+
+    Returns:
+        Tuple of (start, total) or None if the header is missing or malformed
+    """
+    try:
+        unit, _, byte_range = content_range.partition(" ")
+        span, _, total = byte_range.partition("/")
+        start = int(span.split("-")[0])
+        return (start, int(total)) if unit == "bytes" else None
+    except ValueError:
+        return None
+
+
+def sha256_file(file_path: Path):
+    """
+    Hash a file with SHA256.
+
+    Returns the hash object rather than the digest, so a resumed download
+    can keep feeding it the bytes that are appended to the file.
+    """
+    with open(file_path, "rb") as f:
+        try:
+            # Hash straight from the page cache instead of copying through a read buffer
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                sha256_hash = hashlib.sha256()
+                sha256_hash.update(mapped)
+                return sha256_hash
+        except (ValueError, OSError):
+            pass  # Empty files and some filesystems cannot be mapped; read them instead
+
+        if hasattr(os, "posix_fadvise"):
+            # Let the kernel read ahead aggressively for the sequential scan
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        if hasattr(hashlib, "file_digest"):
+            # Python 3.11+: the read/update loop runs entirely in C
+            return hashlib.file_digest(f, "sha256")
+        sha256_hash = hashlib.sha256()
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            sha256_hash.update(chunk)
+        return sha256_hash
+
+
+def split_checksum(checksum: str) -> Tuple[str, str]:
+    """Split an expected checksum into (algorithm, hex digest); unprefixed ones are SHA256."""
+    if checksum.lower().startswith("blake3:"):
+        return "blake3", checksum[len("blake3:"):]
+    return "sha256", checksum
+
+
+def new_hasher(algorithm: str):
+    """Create an empty hash object for the given checksum algorithm."""
+    if algorithm == "blake3":
+        return blake3.blake3(max_threads=blake3.blake3.AUTO)
+    return hashlib.sha256()
+
+
+def hash_file(file_path: Path, algorithm: str = "sha256"):
+    """Hash a file with the given algorithm, returning the hash object."""
+    if algorithm == "blake3":
+        # update_mmap hashes the mapped file on all cores without holding the GIL
+        return new_hasher(algorithm).update_mmap(file_path)
+    return sha256_file(file_path)
+
+
+def checksum_matches(filename: str, calculated: str, expected: str) -> bool:
+    """Compare two hex digests and report the result."""
+    if calculated.lower() == expected.lower():
+        log(f"✅ Checksum verified for {filename}")
+        return True
+    log(f"❌ Checksum mismatch for {filename}")
+    log(f"   Expected: {expected}")
+    log(f"   Got:      {calculated}")
+    return False
+
+
+def verify_checksum(file_path: Path, expected_checksum: str) -> bool:
+    """
+    Verify the checksum of a file.
     
     Args:
         file_path: Path to the file
-        expected_sha256: Expected SHA256 hash
+        expected_checksum: Expected SHA256 hash, or "blake3:<hash>" for BLAKE3
         
     Returns:
         True if checksum matches, False otherwise
     """
-    if not expected_sha256:
+    if not expected_checksum:
         return True  # Skip verification if no checksum provided
     
-    print(f"🔐 Verifying checksum for {file_path.name}...")
-    sha256_hash = hashlib.sha256()
+    log(f"🔐 Verifying checksum for {file_path.name}...")
     
     try:
-        with open(file_path, "rb") as f:
-            # Read in chunks to handle large files
-            for byte_block in iter(lambda: f.read(8192), b""):
-                sha256_hash.update(byte_block)
-        
-        calculated_hash = sha256_hash.hexdigest()
-        
-        if calculated_hash.lower() == expected_sha256.lower():
-            print(f"✅ Checksum verified for {file_path.name}")
-            return True
-        else:
-            print(f"❌ Checksum mismatch for {file_path.name}")
-            print(f"   Expected: {expected_sha256}")
-            print(f"   Got:      {calculated_hash}")
-            return False
+        algorithm, expected = split_checksum(expected_checksum)
+        return checksum_matches(
+            file_path.name, hash_file(file_path, algorithm).hexdigest(), expected
+        )
     except Exception as e:
-        print(f"❌ Error verifying checksum: {e}")
+        log(f"❌ Error verifying checksum: {e}")
         return False
 
 
@@ -115,24 +510,17 @@ class ComfyUIModelDownloader:
 
     def create_directory_structure(self):
         """Creates the necessary ComfyUI directory structure."""
-        directories = [
-            "checkpoints",
-            "unet",
-            "vae",
-            "clip",
-            "t5",
-            "clip_vision",
-            "controlnet",
-            "loras",
-            "upscale_models",
-            "diffusion_models",
-            "animatediff_models",
-            "text_encoders",
-            "ipadapter",
-        ]
+        # One directory listing instead of a mkdir attempt per category; on restarts
+        # every folder usually exists already
+        try:
+            with os.scandir(self.models_dir) as entries:
+                present = {entry.name for entry in entries if entry.is_dir()}
+        except FileNotFoundError:
+            present = set()
 
-        for dir_name in directories:
-            (self.models_dir / dir_name).mkdir(parents=True, exist_ok=True)
+        for dir_name in MODEL_SUBDIRS:
+            if dir_name not in present:
+                (self.models_dir / dir_name).mkdir(parents=True, exist_ok=True)
 
         print(f"📁 Directory structure created in: {self.models_dir}")
 
@@ -141,23 +529,18 @@ class ComfyUIModelDownloader:
         print(f"🔍 DEBUG: Looking for verification file: {self.verification_file}")
 
         # Check if verification file exists
-        if not os.path.exists(self.verification_file):
+        if not os.path.isfile(self.verification_file):
             print(f"❌ Verification file {self.verification_file} not found!")
 
-            # Try alternative locations
-            alternative_paths = [
+            # Try alternative locations, stopping at the first that exists
+            alternative_paths = (
                 "/workspace/link_verification_results.json",
                 "link_verification_results.json",
-                "./link_verification_results.json",
-            ]
-
-            print("🔍 DEBUG: Trying alternative paths...")
-            for alt_path in alternative_paths:
-                print(f"   Checking: {alt_path}")
-                if os.path.exists(alt_path):
-                    print(f"✅ Found verification file at: {alt_path}")
-                    self.verification_file = alt_path
-                    break
+            )
+            found = next((path for path in alternative_paths if os.path.isfile(path)), None)
+            if found:
+                print(f"✅ Found verification file at: {found}")
+                self.verification_file = found
             else:
                 print("❌ No verification file found in any location!")
                 print(
@@ -210,18 +593,17 @@ class ComfyUIModelDownloader:
 
         try:
             print(f"📖 Loading verification file: {self.verification_file}")
-            with open(self.verification_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                valid_links = data.get("valid_links", [])
-                print(f"✅ Loaded {len(valid_links)} valid links")
+            data = load_json_file(self.verification_file)
+            valid_links = data.get("valid_links", [])
+            print(f"✅ Loaded {len(valid_links)} valid links")
 
-                if not valid_links:
-                    print("⚠️  Warning: No valid links found in verification file!")
-                    print("🔍 DEBUG: Verification file contents:")
-                    pretty = json.dumps(data, indent=2)
-                    print(pretty[:500] + "..." if len(pretty) > 500 else pretty)
+            if not valid_links:
+                print("⚠️  Warning: No valid links found in verification file!")
+                print("🔍 DEBUG: Verification file contents:")
+                pretty = json.dumps(data, indent=2)
+                print(pretty[:500] + "..." if len(pretty) > 500 else pretty)
 
-                return valid_links
+            return valid_links
 
         except json.JSONDecodeError as e:
             print(f"❌ Invalid JSON in verification file: {e}")
@@ -233,31 +615,58 @@ class ComfyUIModelDownloader:
             print(f"❌ Error loading verification file ({type(e).__name__}): {e}")
             sys.exit(1)
 
+    def load_checksum_cache(self) -> Dict[str, List]:
+        """
+        Load the cache of verified checksums, keyed by file path.
+
+        Each entry is [size, mtime_ns, sha256] as recorded right after the
+        file was verified, so an unchanged file never needs rehashing.
+        """
+        try:
+            return load_json_file(self.base_dir / CHECKSUM_CACHE_FILE)
+        except (OSError, ValueError):
+            return {}
+
+    def save_checksum_cache(self, cache: Dict[str, List]):
+        """Persist the verified checksum cache; failing to write it is not fatal."""
+        try:
+            dump_json_file(self.base_dir / CHECKSUM_CACHE_FILE, cache)
+        except OSError as e:
+            print(f"⚠️  Could not save checksum cache: {e}")
+
     def determine_target_directory(self, url):
         """Determines the target directory based on URL and filename."""
-        parsed_url = urlparse(url)
-        filename = parsed_url.path.split("/")[-1] if parsed_url.path else "unknown"
-        filename = filename.lower()
-
-        # Use global classification mapping
-        for directory, patterns in MODEL_CLASSIFICATION_MAPPING:
-            # Check if filename contains patterns or has specific extensions
-            for pattern in patterns:
-                if pattern.startswith("."):
-                    if filename.endswith(pattern):
-                        return directory
-                elif pattern in filename:
-                    return directory
-
-        # Default fallback
-        return "diffusion_models"
+        return classify_model_file(filename_from_url(url))
+
+    def create_download_job(self, model_info: Dict) -> DownloadJob:
+        """Parse a model entry's URL once into its file name and target path."""
+        url = model_info.get("url")
+        filename = filename_from_url(url)
+        target_path = self.models_dir / classify_model_file(filename) / filename
+        return DownloadJob(url, filename, target_path, self.expected_checksum(model_info))
+
+    def expected_checksum(self, model_info: Dict) -> Optional[str]:
+        """
+        Pick the checksum to verify a model entry against.
+
+        Entries may carry "sha256" (or the older "checksum") and/or "blake3".
+        BLAKE3 is preferred because it is much faster to verify, but only
+        when the blake3 package is installed.
+        """
+        if BLAKE3_AVAILABLE and model_info.get("blake3"):
+            return f"blake3:{model_info['blake3']}"
+        checksum = model_info.get("sha256") or model_info.get("checksum")
+        if not checksum and model_info.get("blake3"):
+            log(f"⚠️  blake3 not installed, cannot verify {filename_from_url(model_info.get('url'))}")
+        return checksum
 
     def download_file_with_resume(
         self, 
         url: str, 
         target_path: Path, 
         expected_checksum: Optional[str] = None,
-        retry_count: int = 3
+        retry_count: int = 3,
+        progress: Optional[tqdm] = None
     ) -> bool:
         """
         Downloads a single file with resume capability and retry logic.
@@ -265,270 +674,670 @@ class ComfyUIModelDownloader:
         Args:
             url: URL to download from
             target_path: Path to save the file
-            expected_checksum: Expected SHA256 checksum (optional)
+            expected_checksum: Expected checksum (optional, see verify_checksum)
             retry_count: Number of retry attempts
+            progress: Shared progress bar to report bytes to instead of a per-file bar
             
         Returns:
             True if download successful, False otherwise
         """
         target_path = Path(target_path)
         target_path.parent.mkdir(parents=True, exist_ok=True)
-
-        # Clean filename from URL (remove query parameters)
-        clean_url = url.split("?")[0]
-        parsed_url = urlparse(clean_url)
-        filename = parsed_url.path.split("/")[-1] if parsed_url.path else "unknown"
-
+        filename = target_path.name
+
+        control_path = target_path.with_name(filename + ARIA2C_CONTROL_SUFFIX)
+        if not ARIA2C_PATH and control_path.exists():
+            # Only aria2c knows which ranges of that file were filled in, so start over
+            log(f"⚠️  Discarding unfinished aria2c download: {filename}")
+            target_path.unlink(missing_ok=True)
+            control_path.unlink()
+
+        if ARIA2C_PATH:
+            return self.download_file_with_aria2c(url, target_path, expected_checksum, retry_count)
+
+        # Fresh downloads of large files are split into concurrent byte ranges;
+        # partial files and servers without range support use the single stream below
+        if RANGED_DOWNLOAD_PARTS > 1 and not target_path.exists():
+            result = self.download_file_ranged(url, target_path, expected_checksum, progress, retry_count)
+            if result is not None:
+                return result
+
+        wait_time = RETRY_BASE_DELAY_SECONDS
         for attempt in range(retry_count):
             try:
                 # Check if file exists and get current size
-                existing_size = 0
-                if target_path.exists():
-                    existing_size = target_path.stat().st_size
-                    
-                    # Try HEAD request to get total size
-                    try:
-                        head_response = self.session.head(url, timeout=10, allow_redirects=True)
-                        total_size = int(head_response.headers.get("content-length", 0))
-                        
-                        # If file is complete, verify checksum if provided
-                        if existing_size == total_size and total_size > 0:
-                            if expected_checksum:
-                                if verify_checksum(target_path, expected_checksum):
-                                    print(f"✅ File already complete: {filename}")
-                                    return True
-                                else:
-                                    print(f"⚠️  Checksum mismatch, re-downloading: {filename}")
-                                    target_path.unlink()
-                                    existing_size = 0
-                            else:
-                                print(f"✅ File already complete: {filename}")
-                                return True
-                    except Exception as e:
-                        print(f"⚠️  Could not verify existing file size: {e}")
+                existing_size = target_path.stat().st_size if target_path.exists() else 0
 
-                # Set up headers for resume capability
-                headers = {}
-                mode = "wb"
+                # Set up headers for resume capability. No HEAD request: the ranged GET
+                # itself answers 206 (resume), 200 (no range support) or 416 (complete)
+                headers = auth_headers(url)
                 if existing_size > MIN_VALID_FILE_SIZE_KB * KB_TO_BYTES:
                     headers["Range"] = f"bytes={existing_size}-"
-                    mode = "ab"
-                    print(f"▶️  Resuming download: {filename} from {existing_size / MIB_TO_BYTES:.1f} MB")
+                    log(f"▶️  Resuming download: {filename} from {existing_size / MIB_TO_BYTES:.1f} MB")
                 else:
-                    print(f"⬇️  Downloading: {filename} (Attempt {attempt + 1}/{retry_count})")
+                    existing_size = 0
+                    log(f"⬇️  Downloading: {filename} (Attempt {attempt + 1}/{retry_count})")
+
+                response = self.session.get(url, stream=True, timeout=30, headers=headers)
+
+                # Handle HTTP 416 Range Not Satisfiable
+                if response.status_code == 416:
+                    response.close()
+                    # "bytes */<total>": a range starting at the end means the file is complete
+                    remote_size = response.headers.get("content-range", "").rpartition("/")[2]
+                    if remote_size.isdigit() and int(remote_size) == existing_size:
+                        if verify_checksum(target_path, expected_checksum):
+                            log(f"✅ File already complete: {filename}")
+                            return True
+                        log(f"⚠️  Checksum mismatch, re-downloading: {filename}")
+                    else:
+                        log(f"⚠️  Resume not supported, restarting download: {filename}")
+                    existing_size = 0
+                    # Retry without Range header
+                    response = self.session.get(
+                        url, stream=True, timeout=30, headers=auth_headers(url)
+                    )
 
                 # Stream download with progress bar
-                with self.session.get(url, stream=True, timeout=30, headers=headers) as response:
+                with response:
                     response.raise_for_status()
-                    
-                    # Handle HTTP 416 Range Not Satisfiable
-                    if response.status_code == 416:
-                        print(f"⚠️  Resume not supported, restarting download: {filename}")
-                        if target_path.exists():
-                            target_path.unlink()
-                        existing_size = 0
-                        headers = {}
-                        mode = "wb"
-                        # Retry without Range header
-                        response = self.session.get(url, stream=True, timeout=30)
-                        response.raise_for_status()
 
                     # Get total size
                     if response.status_code == 206:  # Partial content
-                        content_range = response.headers.get("content-range", "")
-                        if content_range:
-                            total_size = int(content_range.split("/")[-1])
-                        else:
-                            total_size = existing_size + int(response.headers.get("content-length", 0))
+                        content_range = parse_content_range(response.headers.get("content-range", ""))
+                        if not content_range or content_range[0] != existing_size:
+                            # Appending a body that starts elsewhere would corrupt the file
+                            target_path.unlink()
+                            raise requests.exceptions.RequestException(
+                                f"Unexpected Content-Range for resumed download: "
+                                f"{response.headers.get('content-range')}"
+                            )
+                        total_size = content_range[1]
                     else:
+                        if existing_size:
+                            # Server ignored the Range header and sent the whole file
+                            log(f"⚠️  Server does not support resume, restarting download: {filename}")
+                            existing_size = 0
                         total_size = int(response.headers.get("content-length", 0))
 
-                    # Create progress bar
-                    with tqdm(
-                        total=total_size,
-                        initial=existing_size,
-                        unit="B",
-                        unit_scale=True,
-                        unit_divisor=1024,
-                        desc=filename[:40],
-                        disable=not sys.stdout.isatty()  # Disable in non-interactive mode
-                    ) as pbar:
-                        with open(target_path, mode) as f:
-                            for chunk in response.iter_content(chunk_size=8192):
-                                if chunk:
-                                    f.write(chunk)
-                                    pbar.update(len(chunk))
-
-                # Verify checksum if provided
-                if expected_checksum:
-                    if not verify_checksum(target_path, expected_checksum):
-                        print(f"❌ Checksum verification failed for: {filename}")
+                    mode = "ab" if existing_size else "wb"
+
+                    bar = self.progress_bar(progress, filename, total_size, existing_size)
+
+                    # Hash while streaming instead of re-reading the file afterwards;
+                    # a resumed download only re-reads the part already on disk
+                    hasher = None
+                    if expected_checksum:
+                        algorithm, expected = split_checksum(expected_checksum)
+                        hasher = hash_file(target_path, algorithm) if existing_size else new_hasher(algorithm)
+
+                    # Copy the raw stream to disk in C with the progress bar hooked into write()
+                    # Only decodes if a server ignores Accept-Encoding: identity; otherwise a no-op
+                    response.raw.decode_content = True
+                    with open(target_path, mode) as f, bar as pbar:
+                        if total_size:
+                            reserve_disk_space(f.fileno(), existing_size, total_size - existing_size)
+                        out = HashingWriter(f, hasher, pbar.update)
+                        shutil.copyfileobj(response.raw, out, length=DOWNLOAD_CHUNK_SIZE)
+
+                if hasher is not None:
+                    if not checksum_matches(filename, hasher.hexdigest(), expected):
+                        log(f"❌ Checksum verification failed for: {filename}")
                         if attempt < retry_count - 1:
-                            print(f"🔄 Retrying download...")
+                            log(f"🔄 Retrying download...")
                             target_path.unlink()
                             continue
                         return False
 
-                print(f"✅ Successfully downloaded: {filename}")
+                drop_page_cache(target_path)
+                log(f"✅ Successfully downloaded: {filename}")
                 return True
 
-            except requests.exceptions.RequestException as e:
-                print(f"❌ Download error (Attempt {attempt + 1}): {e}")
+            except DOWNLOAD_RETRY_ERRORS as e:
+                log(f"❌ Download error (Attempt {attempt + 1}): {e}")
                 if attempt < retry_count - 1:
-                    # Exponential backoff with cap at 60 seconds
-                    wait_time = min((2 ** (attempt + 1)) * RETRY_BASE_DELAY_SECONDS, 60)
-                    print(f"⏳ Waiting {wait_time} seconds before retry...")
+                    # Jittered exponential backoff, or the server's Retry-After
+                    wait_time = retry_delay(wait_time, getattr(e, "response", None))
+                    log(f"⏳ Waiting {wait_time:.1f} seconds before retry...")
                     time.sleep(wait_time)
                 else:
-                    print(f"❌ Maximum retries reached for: {url}")
+                    log(f"❌ Maximum retries reached for: {url}")
                     return False
 
             except Exception as e:
-                print(f"❌ Unexpected error: {e}")
+                log(f"❌ Unexpected error: {e}")
                 return False
 
         return False
 
+    def progress_bar(
+        self,
+        progress: Optional[tqdm],
+        filename: str,
+        total_size: int,
+        existing_size: int = 0
+    ):
+        """
+        Return a context manager yielding the progress bar for one file.
+
+        With a shared bar the file's remaining bytes are added to its total,
+        otherwise a per-file bar is created.
+        """
+        if progress is not None:
+            # Count this file into the bar shared by all parallel downloads
+            if total_size:
+                with progress.get_lock():
+                    progress.total += total_size - existing_size
+                    progress.refresh()
+            return nullcontext(progress)
+        return tqdm(
+            total=total_size,
+            initial=existing_size,
+            unit="B",
+            unit_scale=True,
+            unit_divisor=1024,
+            desc=filename[:40],
+            disable=not sys.stdout.isatty(),  # Disable in non-interactive mode
+        )
+
+    def download_file_ranged(
+        self,
+        url: str,
+        target_path: Path,
+        expected_checksum: Optional[str] = None,
+        progress: Optional[tqdm] = None,
+        retry_count: int = 3
+    ) -> Optional[bool]:
+        """
+        Downloads a large file as concurrent byte ranges written with os.pwrite.
+
+        The parts are written into a ".part" file that is renamed into place
+        once complete, so an interrupted run never leaves a file with holes
+        that the size-based resume logic would mistake for a partial download.
+        How far each range got is saved next to it in ".part.json", so a
+        failed or interrupted download resumes every range where it stopped.
+
+        Args:
+            url: URL to download from
+            target_path: Path to save the file
+            expected_checksum: Expected checksum (optional, see verify_checksum)
+            progress: Shared progress bar to report bytes to instead of a per-file bar
+            retry_count: Number of retry attempts
+
+        Returns:
+            True or False for a completed attempt, or None if the file is too
+            small, the server does not support ranges, or the ranged download
+            cannot be used and a single-stream download should be used instead
+        """
+        filename = target_path.name
+        try:
+            head_response = self.session.head(
+                url, timeout=10, allow_redirects=True, headers=auth_headers(url)
+            )
+            head_response.raise_for_status()
+        except requests.exceptions.RequestException:
+            return None
+
+        total_size = int(head_response.headers.get("content-length", 0))
+        accepts_ranges = head_response.headers.get("accept-ranges", "").lower() == "bytes"
+        if not accepts_ranges or total_size < RANGED_DOWNLOAD_MIN_SIZE:
+            return None
+
+        part_path = target_path.with_name(filename + ".part")
+        state_path = target_path.with_name(filename + ".part.json")
+
+        # [next offset, last byte] per range, advanced in place by fetch_range
+        ranges = load_ranged_state(state_path, part_path, url, total_size)
+        if ranges is None:
+            part_size = -(-total_size // RANGED_DOWNLOAD_PARTS)  # Ceiling division
+            ranges = [
+                [start, min(start + part_size, total_size) - 1]
+                for start in range(0, total_size, part_size)
+            ]
+            flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+            log(f"⬇️  Downloading: {filename} in {len(ranges)} parallel ranges")
+        else:
+            flags = os.O_WRONLY
+            done_size = total_size - unfinished_bytes(ranges)
+            log(f"▶️  Resuming ranged download: {filename} from {done_size / MIB_TO_BYTES:.1f} MB")
+
+        def save_state():
+            try:
+                dump_json_file(state_path, {"url": url, "size": total_size, "ranges": ranges})
+            except OSError:
+                pass  # Best effort: without it the next run just starts this file over
+
+        def release_progress():
+            # Take the bytes this attempt will not deliver back out of the shared total
+            remaining = unfinished_bytes(ranges)
+            if progress is not None and remaining:
+                with progress.get_lock():
+                    progress.total -= remaining
+                    progress.refresh()
+
+        fd = os.open(part_path, flags, 0o644)
+        try:
+            reserve_disk_space(fd, 0, total_size)
+            with self.progress_bar(progress, filename, total_size, total_size - unfinished_bytes(ranges)) as pbar:
+                wait_time = RETRY_BASE_DELAY_SECONDS
+                for attempt in range(retry_count):
+                    try:
+                        self.fetch_ranges(url, fd, ranges, pbar, save_state)
+                        break
+                    except RangeNotHonouredError:
+                        raise
+                    except requests.exceptions.RequestException as e:
+                        if attempt == retry_count - 1:
+                            raise
+                        log(f"❌ Ranged download error (Attempt {attempt + 1}): {e}")
+                        wait_time = retry_delay(wait_time, e.response)
+                        log(f"⏳ Waiting {wait_time:.1f} seconds before retry...")
+                        time.sleep(wait_time)
+        except RangeNotHonouredError as e:
+            log(f"⚠️  Ranged download failed, falling back to a single stream: {filename} ({e})")
+            release_progress()
+            part_path.unlink(missing_ok=True)
+            state_path.unlink(missing_ok=True)
+            return None
+        except (requests.exceptions.RequestException, OSError) as e:
+            save_state()
+            release_progress()
+            done_size = total_size - unfinished_bytes(ranges)
+            log(f"❌ Ranged download failed, keeping {done_size / MIB_TO_BYTES:.1f} MB to resume: {filename} ({e})")
+            return False
+        finally:
+            os.close(fd)
+
+        state_path.unlink(missing_ok=True)
+        # Parts arrive out of order, so the checksum needs one read of the finished file
+        if expected_checksum and not verify_checksum(part_path, expected_checksum):
+            log(f"⚠️  Checksum mismatch after ranged download, retrying as a single stream: {filename}")
+            part_path.unlink(missing_ok=True)
+            return None
+
+        os.replace(part_path, target_path)
+        drop_page_cache(target_path)
+        log(f"✅ Successfully downloaded: {filename}")
+        return True
+
+    def fetch_ranges(self, url: str, fd: int, ranges: List[List[int]], pbar: tqdm, save_state):
+        """
+        Fetch every unfinished range concurrently, calling save_state periodically.
+
+        On the first failure the other ranges stop after their current chunk
+        instead of running to completion, and the error is re-raised.
+        """
+        stop = threading.Event()
+        unfinished = [byte_range for byte_range in ranges if byte_range[0] <= byte_range[1]]
+        if not unfinished:
+            return
+        with ThreadPoolExecutor(max_workers=len(unfinished)) as executor:
+            not_done = [
+                executor.submit(self.fetch_range, url, fd, byte_range, pbar, stop)
+                for byte_range in unfinished
+            ]
+            try:
+                while not_done:
+                    done, not_done = wait(
+                        not_done, timeout=RANGED_STATE_SAVE_INTERVAL, return_when=FIRST_EXCEPTION
+                    )
+                    for future in done:
+                        future.result()
+                    save_state()
+            except BaseException:
+                stop.set()
+                raise
+
+    def fetch_range(self, url: str, fd: int, byte_range: List[int], pbar: tqdm, stop: threading.Event):
+        """
+        Download bytes byte_range[0]..byte_range[1] (inclusive) of url into fd at the same offset.
+
+        byte_range[0] is advanced as data is written, so it always holds the
+        next offset still missing. Returns early once stop is set.
+
+        Raises:
+            RangeNotHonouredError: If the server does not return the requested range
+            requests.exceptions.RequestException: If the range ends early
+        """
+        start, end = byte_range
+        headers = {**auth_headers(url), "Range": f"bytes={start}-{end}"}
+        offset = start
+        with self.session.get(url, stream=True, timeout=30, headers=headers) as response:
+            response.raise_for_status()
+            content_range = parse_content_range(response.headers.get("content-range", ""))
+            if response.status_code != 206 or not content_range or content_range[0] != start:
+                raise RangeNotHonouredError(f"Server did not honour Range bytes={start}-{end}")
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if stop.is_set():
+                    return
+                view = memoryview(chunk)
+                while view:
+                    written = os.pwrite(fd, view, offset)
+                    view = view[written:]
+                    offset += written
+                    byte_range[0] = offset
+                pbar.update(len(chunk))
+        if offset != end + 1:
+            raise requests.exceptions.RequestException(
+                f"Range bytes={start}-{end} ended early at byte {offset}"
+            )
+
+    def download_file_with_aria2c(
+        self,
+        url: str,
+        target_path: Path,
+        expected_checksum: Optional[str] = None,
+        retry_count: int = 3
+    ) -> bool:
+        """
+        Downloads a single file with aria2c using several connections per file.
+
+        aria2c splits the file into ranges fetched in parallel and resumes
+        partial files itself, so one large checkpoint is not limited to the
+        throughput of a single TCP stream.
+
+        Args:
+            url: URL to download from
+            target_path: Path to save the file
+            expected_checksum: Expected checksum (optional, see verify_checksum)
+            retry_count: Number of retry attempts
+
+        Returns:
+            True if download successful, False otherwise
+        """
+        filename = target_path.name
+
+        # Pass the URL and headers on stdin so the token never shows up in the process list
+        input_lines = [url, f"  dir={target_path.parent}", f"  out={filename}"]
+        headers = {"User-Agent": self.session.headers["User-Agent"], **auth_headers(url)}
+        for name, value in headers.items():
+            input_lines.append(f"  header={name}: {value}")
+
+        command = [
+            ARIA2C_PATH,
+            "--input-file=-",
+            "--continue=true",
+            "--allow-overwrite=true",
+            "--auto-file-renaming=false",
+            # Reserve the whole file up front, as reserve_disk_space does for the other paths
+            "--file-allocation=falloc",
+            f"--max-connection-per-server={ARIA2C_CONNECTIONS}",
+            f"--split={ARIA2C_CONNECTIONS}",
+            "--min-split-size=10M",
+            f"--max-tries={retry_count}",
+            f"--retry-wait={RETRY_BASE_DELAY_SECONDS}",
+            "--summary-interval=0",
+            "--console-log-level=warn",
+            f"--show-console-readout={'true' if sys.stdout.isatty() else 'false'}",
+        ]
+
+        for attempt in range(retry_count):
+            log(f"⬇️  Downloading with aria2c: {filename} (Attempt {attempt + 1}/{retry_count})")
+            try:
+                result = subprocess.run(command, input="\n".join(input_lines) + "\n", text=True)
+            except OSError as e:
+                log(f"❌ Could not run aria2c: {e}")
+                return False
+
+            if result.returncode != 0:
+                log(f"❌ aria2c failed with exit code {result.returncode} for: {url}")
+                return False
+
+            if expected_checksum and not verify_checksum(target_path, expected_checksum):
+                log(f"❌ Checksum verification failed for: {filename}")
+                if attempt < retry_count - 1:
+                    log("🔄 Retrying download...")
+                    target_path.unlink()
+                    continue
+                return False
+
+            drop_page_cache(target_path)
+            log(f"✅ Successfully downloaded: {filename}")
+            return True
+
+        return False
+
     def download_all_models_parallel(self, models_with_checksums: List[Dict]):
         """
         Downloads all models using parallel workers.
         
         Args:
-            models_with_checksums: List of dicts with 'url' and optional 'checksum' keys
+            models_with_checksums: List of dicts with 'url' and optional 'sha256'/'checksum' and 'blake3' keys
         """
         if not models_with_checksums:
-            print("❌ No models to download!")
+            log("❌ No models to download!")
             return
 
-        print(f"🚀 Starting parallel download of {len(models_with_checksums)} models...")
-        print(f"👷 Using {MAX_WORKERS} parallel workers")
-        print(f"📁 Target directory: {self.models_dir}")
+        log(f"🚀 Starting parallel download of {len(models_with_checksums)} models...")
+        log(f"👷 Using {MAX_WORKERS} parallel workers")
+        log(f"📁 Target directory: {self.models_dir}")
 
         successful = 0
         failed = 0
         skipped = 0
 
-        def download_single_model(model_info: Dict) -> Tuple[str, bool]:
-            """Download a single model and return (url, success)"""
-            url = model_info.get("url")
-            checksum = model_info.get("checksum")
-            
-            # Extract clean filename from URL
-            clean_url = url.split("?")[0]
-            parsed_url = urlparse(clean_url)
-            filename = parsed_url.path.split("/")[-1] if parsed_url.path else "unknown"
-
-            target_dir = self.determine_target_directory(url)
-            target_path = self.models_dir / target_dir / filename
-
-            # Check if file exists and has reasonable size
-            if target_path.exists():
-                file_size = target_path.stat().st_size
-                min_valid_size = MIN_VALID_FILE_SIZE_KB * KB_TO_BYTES
-                if file_size > min_valid_size:
-                    # If checksum provided, verify it
-                    if checksum:
-                        if verify_checksum(target_path, checksum):
-                            print(f"⏭️  Skipping (already exists with valid checksum): {filename}")
-                            return (url, True, True)  # URL, success, skipped
-                        else:
-                            print(f"⚠️  Checksum mismatch, re-downloading: {filename}")
-                            target_path.unlink()
-                    else:
-                        print(f"⏭️  Skipping (already exists): {filename} ({file_size / MIB_TO_BYTES:.1f} MB)")
-                        return (url, True, True)  # URL, success, skipped
-                else:
-                    print(f"⚠️  Incomplete file detected ({file_size / KB_TO_BYTES:.1f} KB), re-downloading: {filename}")
-                    target_path.unlink()
-
-            success = self.download_file_with_resume(url, target_path, checksum)
-            return (url, success, False)  # URL, success, not skipped
+        # One byte-level progress bar for all workers instead of interleaved per-file bars.
+        # aria2c prints its own readout, so the bar stays hidden in that mode.
+        progress = tqdm(
+            total=0,
+            unit="B",
+            unit_scale=True,
+            unit_divisor=1024,
+            desc="Total",
+            mininterval=0.5,  # Many workers update this bar; redraw at most twice a second
+            disable=not sys.stdout.isatty() or bool(ARIA2C_PATH),
+        )
 
-        # Use ThreadPoolExecutor for parallel downloads
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            # Submit all download tasks
-            future_to_model = {
-                executor.submit(download_single_model, model): model 
-                for model in models_with_checksums
-            }
+        # Several entries can resolve to the same file: a model listed twice, or different
+        # repos shipping e.g. diffusion_pytorch_model.safetensors. Only the first is
+        # downloaded, so two workers never write into the same file at once.
+        jobs_by_path = {}
+        for model in models_with_checksums:
+            job = self.create_download_job(model)
+            if job.target_path in jobs_by_path:
+                log(f"⏭️  Skipping duplicate target {job.filename}: {job.url}")
+                skipped += 1
+                continue
+            jobs_by_path[job.target_path] = job
+        jobs = list(jobs_by_path.values())
+
+        # One directory listing per target directory instead of an
+        # exists() + stat() pair per model
+        sizes_by_dir = {}
+        for job in jobs:
+            parent = job.target_path.parent
+            if parent not in sizes_by_dir:
+                sizes_by_dir[parent] = existing_file_sizes(parent)
+            job.existing_size = sizes_by_dir[parent].get(job.filename, 0)
+            job.interrupted = job.filename + ARIA2C_CONTROL_SUFFIX in sizes_by_dir[parent]
+
+        checksum_cache = self.load_checksum_cache()
+
+        def cached_checksum_matches(job: DownloadJob) -> bool:
+            entry = checksum_cache.get(str(job.target_path))
+            if not entry:
+                return False
+            try:
+                st = job.target_path.stat()
+            except OSError:
+                return False
+            return entry == [st.st_size, st.st_mtime_ns, job.checksum.lower()]
 
-            # Process completed downloads
-            for future in as_completed(future_to_model):
-                try:
-                    url, success, was_skipped = future.result()
-                    if was_skipped:
+        def record_checksum(job: DownloadJob):
+            try:
+                st = job.target_path.stat()
+            except OSError:
+                # Removed or replaced meanwhile; the next run simply verifies it again
+                checksum_cache.pop(str(job.target_path), None)
+                return
+            checksum_cache[str(job.target_path)] = [st.st_size, st.st_mtime_ns, job.checksum.lower()]
+
+        # Files already on disk are verified on their own pool so download workers are not
+        # held up re-reading them; hashlib releases the GIL, so those threads hash in parallel.
+        # New downloads are hashed while they stream, without a second read.
+        verify_workers = min(MAX_WORKERS, os.cpu_count() or 1)
+        with progress, ThreadPoolExecutor(max_workers=MAX_WORKERS) as download_pool, \
+                ThreadPoolExecutor(max_workers=verify_workers) as verify_pool:
+            pending = {}  # future -> (stage, job)
+
+            def start_download(job: DownloadJob):
+                future = download_pool.submit(
+                    self.download_file_with_resume,
+                    job.url,
+                    job.target_path,
+                    job.checksum,
+                    progress=progress,
+                )
+                pending[future] = ("download", job)
+
+            def start_verify(job: DownloadJob):
+                pending[verify_pool.submit(verify_checksum, job.target_path, job.checksum)] = ("verify", job)
+
+            min_valid_size = MIN_VALID_FILE_SIZE_KB * KB_TO_BYTES
+            to_verify = 0
+            for job in jobs:
+                # aria2c writes segments out of order, so an interrupted file has holes and its size means nothing
+                if job.interrupted:
+                    log(f"▶️  Resuming interrupted download: {job.filename}")
+                    start_download(job)
+                    continue
+                # Check if file exists and has reasonable size
+                if job.existing_size > min_valid_size:
+                    if job.checksum and cached_checksum_matches(job):
+                        log(f"⏭️  Skipping (already verified): {job.filename}")
                         skipped += 1
-                    elif success:
+                    elif job.checksum:
+                        start_verify(job)
+                        to_verify += 1
+                    else:
+                        log(f"⏭️  Skipping (already exists): {job.filename} ({job.existing_size / MIB_TO_BYTES:.1f} MB)")
+                        skipped += 1
+                    continue
+                if job.existing_size:
+                    log(f"⚠️  Incomplete file detected ({job.existing_size / KB_TO_BYTES:.1f} KB), re-downloading: {job.filename}")
+                    job.target_path.unlink()
+                start_download(job)
+
+            log(
+                f"📋 {skipped} skipped, {to_verify} to verify, "
+                f"{len(pending) - to_verify} to download"
+            )
+
+            # Process completed downloads and verifications
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, job = pending.pop(future)
+                    try:
+                        ok = future.result()
+                    except Exception as e:
+                        log(f"❌ Unexpected error in {stage} task: {e}")
+                        failed += 1
+                        continue
+
+                    if stage == "verify":
+                        if ok:
+                            log(f"⏭️  Skipping (already exists with valid checksum): {job.filename}")
+                            record_checksum(job)
+                            skipped += 1
+                        else:
+                            # A full-size file would take the "already complete" path and be
+                            # hashed a second time, so start from scratch instead
+                            log(f"⚠️  Checksum mismatch, re-downloading: {job.filename}")
+                            job.target_path.unlink(missing_ok=True)
+                            start_download(job)
+                    elif ok:
+                        if job.checksum:
+                            record_checksum(job)
                         successful += 1
                     else:
                         failed += 1
-                except Exception as e:
-                    print(f"❌ Unexpected error in download task: {e}")
-                    failed += 1
-
-        print("\n🎉 Download Statistics:")
-        print(f"✅ Successful: {successful}")
-        print(f"⏭️  Skipped: {skipped}")
-        print(f"❌ Failed: {failed}")
+
+        self.save_checksum_cache(checksum_cache)
+
+        log("\n🎉 Download Statistics:")
+        log(f"✅ Successful: {successful}")
+        log(f"⏭️  Skipped: {skipped}")
+        log(f"❌ Failed: {failed}")
         total = successful + failed
         if total > 0:
-            print(f"📊 Success rate: {(successful / total) * 100:.1f}%")
+            log(f"📊 Success rate: {(successful / total) * 100:.1f}%")
 
         if failed > 0:
-            print(f"\n⚠️  {failed} downloads failed.")
-            print("🔄 You can run the script again to retry failed downloads.")
+            log(f"\n⚠️  {failed} downloads failed.")
+            log("🔄 You can run the script again to retry failed downloads.")
         else:
-            print("\n🎊 All downloads completed successfully!")
+            log("\n🎊 All downloads completed successfully!")
+
+    def summarize_model_files(self, entries) -> List[Tuple[str, int, Dict]]:
+        """Build (category, size in bytes, summary record) tuples for model file DirEntries."""
+        records = []
+        # DirEntry.stat() reuses the data from the directory scan where possible
+        for entry in entries:
+            rel_path = os.path.relpath(os.path.dirname(entry.path), self.models_dir)
+            category = rel_path if rel_path != "." else "root"
+            size = entry.stat().st_size
+            records.append(
+                (
+                    category,
+                    size,
+                    {
+                        "filename": entry.name,
+                        "size_mb": round(size / MIB_TO_BYTES, 2),
+                        "path": os.path.relpath(entry.path, self.base_dir),
+                    },
+                )
+            )
+        return records
 
     def create_download_summary(self):
         """Creates a summary of downloaded models."""
         summary_file = self.base_dir / "downloaded_models_summary.json"
 
+        with os.scandir(self.models_dir) as entries:
+            top_level = list(entries)
+        subdirs = [entry.path for entry in top_level if entry.is_dir(follow_symlinks=False)]
+        root_files = [
+            entry for entry in top_level
+            if not entry.is_dir(follow_symlinks=False) and entry.name.endswith(MODEL_FILE_EXTENSIONS)
+        ]
+
+        # Stats are I/O bound, so each category directory is scanned in its own thread
         model_info = {}
-        for root, dirs, files in os.walk(self.models_dir):
-            for file in files:
-                if file.endswith((".safetensors", ".ckpt", ".pth", ".bin", ".pt")):
-                    rel_path = os.path.relpath(root, self.models_dir)
-                    category = rel_path if rel_path != "." else "root"
-
-                    if category not in model_info:
-                        model_info[category] = []
-
-                    file_path = Path(root) / file
-                    size_mb = file_path.stat().st_size / MIB_TO_BYTES
-
-                    model_info[category].append(
-                        {
-                            "filename": file,
-                            "size_mb": round(size_mb, 2),
-                            "path": str(file_path.relative_to(self.base_dir)),
-                        }
-                    )
+        records = self.summarize_model_files(root_files)
+        if subdirs:
+            with ThreadPoolExecutor(max_workers=len(subdirs)) as executor:
+                for subdir_records in executor.map(
+                    lambda path: self.summarize_model_files(iter_model_files(path)), subdirs
+                ):
+                    records.extend(subdir_records)
+
+        # Totals are accumulated while grouping instead of re-walking model_info afterwards
+        total_bytes = 0
+        for category, size, record in records:
+            model_info.setdefault(category, []).append(record)
+            total_bytes += size
 
         # Sort by category and filename
-        for category in model_info:
-            model_info[category].sort(key=lambda x: x["filename"])
+        by_filename = itemgetter("filename")
+        for files in model_info.values():
+            files.sort(key=by_filename)
 
         # Get repository URL from environment or use default
         repository_url = os.getenv(
             "REPOSITORY_URL", "https://github.com/EcomTree/runpod-comfyui-cloud"
         )
 
-        with open(summary_file, "w", encoding="utf-8") as f:
-            json.dump(
-                {
-                    "total_files": sum(len(files) for files in model_info.values()),
-                    "total_size_mb": round(
-                        sum(sum(f["size_mb"] for f in files) for files in model_info.values()), 2
-                    ),
-                    "download_date": time.time(),
-                    "repository": repository_url,
-                    "models": model_info,
-                },
-                f,
-                indent=2,
-                ensure_ascii=False,
-            )
+        dump_json_file(
+            summary_file,
+            {
+                "total_files": len(records),
+                "total_size_mb": round(total_bytes / MIB_TO_BYTES, 2),
+                "download_date": time.time(),
+                "repository": repository_url,
+                "models": model_info,
+            },
+        )
 
         print(f"📋 Download summary created: {summary_file}")
 
@@ -540,21 +1349,17 @@ def load_models_with_checksums() -> List[Dict]:
     Load models from models_download.json with checksum support.
     
     Returns:
-        List of dicts with 'url' and optional 'checksum' keys
+        List of dicts with 'url' and optional 'sha256'/'checksum' and 'blake3' keys
     """
-    models_file = Path("/workspace/models_download.json")
-    
-    if not models_file.exists():
-        # Try alternative location
-        models_file = Path("models_download.json")
-    
-    if not models_file.exists():
+    candidates = (Path("/workspace/models_download.json"), Path("models_download.json"))
+    models_file = next((path for path in candidates if path.is_file()), None)
+
+    if models_file is None:
         print("❌ models_download.json not found!")
         return []
     
     try:
-        with open(models_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = load_json_file(models_file)
         
         models_list = []
         for category, items in data.items():
@@ -13,12 +13,30 @@ Usage:
 """
 
 import argparse
+import importlib.util
 import json
+import os
 import sys
 from pathlib import Path
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 import hashlib
-from urllib.parse import urlparse
+
+HASH_CHUNK_SIZE = 1024 * 1024  # Read size for checksums; 8 KiB reads cost ~128k iterations per GB
+MODEL_FILE_EXTENSIONS = ('.safetensors', '.ckpt', '.pth', '.bin', '.pt')
+VERIFY_MAX_WORKERS = 8  # Parallel checksum threads for the verify command
+
+
+@lru_cache(maxsize=None)
+def load_download_module():
+    """Load download_models.py from this directory, once, without touching sys.path."""
+    spec = importlib.util.spec_from_file_location(
+        "download_models", Path(__file__).parent / "download_models.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
 
 
 def get_models_dir(base_dir: Path = Path("/workspace")) -> Path:
@@ -26,12 +44,18 @@ def get_models_dir(base_dir: Path = Path("/workspace")) -> Path:
     return base_dir / "ComfyUI" / "models"
 
 
-def load_models_config(config_file: Optional[Path] = None) -> Dict:
-    """Load models configuration from JSON."""
+def find_models_config(config_file: Optional[Path] = None) -> Path:
+    """Return the models configuration path, falling back to the current directory."""
     if not config_file:
         config_file = Path("/workspace/models_download.json")
         if not config_file.exists():
             config_file = Path("models_download.json")
+    return config_file
+
+
+def load_models_config(config_file: Optional[Path] = None) -> Dict:
+    """Load models configuration from JSON."""
+    config_file = find_models_config(config_file)
     
     if not config_file.exists():
         print(f"❌ Models config not found: {config_file}")
@@ -41,6 +65,57 @@ def load_models_config(config_file: Optional[Path] = None) -> Dict:
         return json.load(f)
 
 
+def url_basename(url: str) -> str:
+    """Return the file name at the end of a URL's path, without query or fragment."""
+    return url.partition('#')[0].partition('?')[0].rpartition('/')[2]
+
+
+def build_url_index(config: Dict) -> List[Dict]:
+    """
+    Flatten a models configuration into one entry per model.
+    
+    Each entry has 'category', 'url', 'filename', 'checksum' and 'model'
+    (the config item as a dict), so commands do not re-parse every URL.
+    """
+    index = []
+    for category, items in config.items():
+        for item in items:
+            if isinstance(item, str):
+                model = {'url': item}
+            elif isinstance(item, dict):
+                model = item
+            else:
+                continue
+            
+            url = model.get('url', '')
+            index.append({
+                'category': category,
+                'url': url,
+                'filename': url_basename(url),
+                'checksum': model.get('sha256') or model.get('checksum'),
+                'model': model,
+            })
+    return index
+
+
+@lru_cache(maxsize=4)
+def _cached_url_index(config_file: str, mtime_ns: int) -> Tuple[Dict, ...]:
+    return tuple(build_url_index(load_models_config(Path(config_file))))
+
+
+def load_url_index(config_file: Optional[Path] = None) -> Tuple[Dict, ...]:
+    """Load the models configuration as a URL index, cached until the file changes."""
+    config_file = find_models_config(config_file)
+    
+    try:
+        mtime_ns = config_file.stat().st_mtime_ns
+    except OSError:
+        print(f"❌ Models config not found: {config_file}")
+        return ()
+    
+    return _cached_url_index(str(config_file), mtime_ns)
+
+
 def list_installed_models(base_dir: Path = Path("/workspace")):
     """List all installed models."""
     models_dir = get_models_dir(base_dir)
@@ -59,18 +134,20 @@ def list_installed_models(base_dir: Path = Path("/workspace")):
     ]
     
     total_files = 0
-    total_size_mb = 0
+    total_size = 0
     
     for category in categories:
         category_dir = models_dir / category
-        if not category_dir.exists():
-            continue
         
-        files = list(category_dir.glob('*.safetensors')) + \
-                list(category_dir.glob('*.ckpt')) + \
-                list(category_dir.glob('*.pth')) + \
-                list(category_dir.glob('*.bin')) + \
-                list(category_dir.glob('*.pt'))
+        # One directory read per category; DirEntry caches the stat result
+        try:
+            with os.scandir(category_dir) as entries:
+                files = [
+                    entry for entry in entries
+                    if entry.name.endswith(MODEL_FILE_EXTENSIONS) and entry.is_file()
+                ]
+        except (FileNotFoundError, NotADirectoryError):
+            continue
         
         if not files:
             continue
@@ -78,16 +155,36 @@ def list_installed_models(base_dir: Path = Path("/workspace")):
         print(f"\n{category.upper()}: ({len(files)} files)")
         print("-" * 80)
         
-        for file in sorted(files):
-            size_mb = file.stat().st_size / (1024 * 1024)
-            total_size_mb += size_mb
+        for entry in sorted(files, key=lambda e: e.name):
+            size = entry.stat().st_size
+            total_size += size
             total_files += 1
-            print(f"  • {file.name:<60} {size_mb:>10.1f} MB")
+            print(f"  • {entry.name:<60} {size / (1024 * 1024):>10.1f} MB")
     
+    total_size_mb = total_size / (1024 * 1024)
     print("\n" + "=" * 80)
     print(f"Total: {total_files} files, {total_size_mb:.1f} MB ({total_size_mb/1024:.2f} GB)")
 
 
+def iter_category_files(models_dir: Path):
+    """Yield os.DirEntry objects for the files inside each category directory."""
+    with os.scandir(models_dir) as categories:
+        for category in categories:
+            if not category.is_dir():
+                continue
+            with os.scandir(category.path) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        yield entry
+
+
+def confirm(prompt: str) -> bool:
+    """Ask for a yes/no confirmation; non-interactive runs are treated as yes."""
+    if not sys.stdin.isatty():
+        return True
+    return input(prompt).lower() == 'y'
+
+
 def find_model_by_name(name: str, base_dir: Path = Path("/workspace")) -> Optional[Path]:
     """Find a model file by partial name match."""
     models_dir = get_models_dir(base_dir)
@@ -95,82 +192,61 @@ def find_model_by_name(name: str, base_dir: Path = Path("/workspace")) -> Option
     if not models_dir.exists():
         return None
     
-    # Search all subdirectories
-    for category_dir in models_dir.iterdir():
-        if not category_dir.is_dir():
-            continue
-        
-        for file in category_dir.glob('*'):
-            if name.lower() in file.name.lower():
-                return file
+    # Search all subdirectories, stopping at the first match
+    needle = name.lower()
+    for entry in iter_category_files(models_dir):
+        if needle in entry.name.lower():
+            return Path(entry.path)
     
     return None
 
 
 def download_model(model_name: str, base_dir: Path = Path("/workspace")):
     """Download a specific model by name."""
-    config = load_models_config()
+    index = load_url_index()
     
-    if not config:
+    if not index:
         print("❌ Could not load models configuration")
         return
     
-    # Search for model URL
-    model_url = None
-    model_category = None
+    # Exact file names resolve with one dict lookup; otherwise take the first partial match
+    needle = model_name.lower()
+    by_name = {}
+    for entry in index:
+        by_name.setdefault(entry['filename'].lower(), entry)
     
-    for category, items in config.items():
-        for item in items:
-            if isinstance(item, str):
-                url = item
-            elif isinstance(item, dict):
-                url = item.get('url', '')
-            else:
-                continue
-            
-            # Extract filename from URL
-            parsed_url = urlparse(url)
-            filename = parsed_url.path.split("/")[-1] if parsed_url.path else ""
-            
-            if model_name.lower() in filename.lower():
-                model_url = url
-                model_category = category
-                break
-        
-        if model_url:
-            break
+    match = by_name.get(needle)
+    if match is None:
+        match = next((entry for entry in index if needle in entry['filename'].lower()), None)
     
-    if not model_url:
+    if not match:
         print(f"❌ Model '{model_name}' not found in configuration")
         print("💡 Use 'python model_manager.py search <name>' to find available models")
         return
     
+    model_url = match['url']
+    model_category = match['category']
+    filename = match['filename'] or "model"
+    
     print(f"📥 Downloading: {model_name}")
     print(f"   Category: {model_category}")
     print(f"   URL: {model_url}")
     
     # Import download functionality
-    sys.path.insert(0, str(Path(__file__).parent))
-    try:
-        import download_models
-        
-        downloader = download_models.ComfyUIModelDownloader(base_dir=str(base_dir))
-        
-        # Determine target path
-        parsed_url = urlparse(model_url)
-        filename = parsed_url.path.split("/")[-1] if parsed_url.path else "model"
-        target_path = get_models_dir(base_dir) / model_category / filename
-        
-        # Download
-        success = downloader.download_file_with_resume(model_url, target_path)
-        
-        if success:
-            print(f"✅ Successfully downloaded: {filename}")
-        else:
-            print(f"❌ Download failed for: {filename}")
-            
-    finally:
-        sys.path.pop(0)
+    download_models = load_download_module()
+    
+    downloader = download_models.ComfyUIModelDownloader(base_dir=str(base_dir))
+    
+    # Determine target path
+    target_path = get_models_dir(base_dir) / model_category / filename
+    
+    # Download
+    success = downloader.download_file_with_resume(model_url, target_path)
+    
+    if success:
+        print(f"✅ Successfully downloaded: {filename}")
+    else:
+        print(f"❌ Download failed for: {filename}")
 
 
 def remove_model(model_name: str, base_dir: Path = Path("/workspace")):
@@ -187,11 +263,9 @@ def remove_model(model_name: str, base_dir: Path = Path("/workspace")):
     print(f"   File: {model_path}")
     print(f"   Size: {size_mb:.1f} MB")
     
-    if sys.stdin.isatty():
-        response = input("   Continue? [y/N]: ")
-        if response.lower() != 'y':
-            print("❌ Cancelled")
-            return
+    if not confirm("   Continue? [y/N]: "):
+        print("❌ Cancelled")
+        return
     
     try:
         model_path.unlink()
@@ -201,24 +275,29 @@ def remove_model(model_name: str, base_dir: Path = Path("/workspace")):
         print(f"❌ Error removing model: {e}")
 
 
+def sha256_file(path: Path) -> str:
+    """Return the SHA256 hex digest of a file."""
+    with open(path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):
+            # Python 3.11+: the read/update loop runs in C without the GIL
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        sha256_hash = hashlib.sha256()
+        buffer = memoryview(bytearray(HASH_CHUNK_SIZE))
+        while n := f.readinto(buffer):
+            sha256_hash.update(buffer[:n])
+        return sha256_hash.hexdigest()
+
+
 def verify_checksums(base_dir: Path = Path("/workspace")):
     """Verify checksums of all models with known checksums."""
-    config = load_models_config()
+    index = load_url_index()
     
-    if not config:
+    if not index:
         print("❌ Could not load models configuration")
         return
     
     # Collect models with checksums
-    models_with_checksums = []
-    for category, items in config.items():
-        for item in items:
-            if isinstance(item, dict) and 'checksum' in item:
-                models_with_checksums.append({
-                    'url': item['url'],
-                    'checksum': item['checksum'],
-                    'category': category
-                })
+    models_with_checksums = [entry for entry in index if entry['checksum']]
     
     if not models_with_checksums:
         print("ℹ️  No checksums found in models configuration")
@@ -231,14 +310,11 @@ def verify_checksums(base_dir: Path = Path("/workspace")):
     failed = 0
     missing = 0
     
+    tasks = []
     for model_info in models_with_checksums:
-        url = model_info['url']
         expected_checksum = model_info['checksum']
         category = model_info['category']
-        
-        # Get filename from URL
-        parsed_url = urlparse(url)
-        filename = parsed_url.path.split("/")[-1] if parsed_url.path else ""
+        filename = model_info['filename']
         
         # Find file
         model_path = get_models_dir(base_dir) / category / filename
@@ -248,24 +324,34 @@ def verify_checksums(base_dir: Path = Path("/workspace")):
             missing += 1
             continue
         
-        # Calculate checksum
-        print(f"🔍 Checking: {filename}... ", end='', flush=True)
-        
-        sha256_hash = hashlib.sha256()
-        with open(model_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(8192), b""):
-                sha256_hash.update(byte_block)
-        
-        calculated = sha256_hash.hexdigest()
-        
-        if calculated.lower() == expected_checksum.lower():
-            print("✅ OK")
-            verified += 1
-        else:
-            print("❌ FAILED")
-            print(f"   Expected: {expected_checksum}")
-            print(f"   Got:      {calculated}")
-            failed += 1
+        tasks.append((model_path, expected_checksum))
+    
+    # hashlib releases the GIL, so files are hashed in parallel; a few workers
+    # are enough to saturate the disk without thrashing seeks on HDDs
+    max_workers = min(VERIFY_MAX_WORKERS, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(sha256_file, model_path): (model_path, expected_checksum)
+            for model_path, expected_checksum in tasks
+        }
+        # Results are printed from this thread only, so lines never interleave
+        for future in as_completed(futures):
+            model_path, expected_checksum = futures[future]
+            try:
+                calculated = future.result()
+            except OSError as e:
+                print(f"❌ Error reading {model_path.name}: {e}")
+                failed += 1
+                continue
+            
+            if calculated.lower() == expected_checksum.lower():
+                print(f"✅ OK: {model_path.name}")
+                verified += 1
+            else:
+                print(f"❌ FAILED: {model_path.name}")
+                print(f"   Expected: {expected_checksum}")
+                print(f"   Got:      {calculated}")
+                failed += 1
     
     print("\n" + "=" * 80)
     print(f"✅ Verified: {verified}")
@@ -275,39 +361,24 @@ def verify_checksums(base_dir: Path = Path("/workspace")):
 
 def prune_unused_models(base_dir: Path = Path("/workspace"), dry_run: bool = True):
     """Remove models not in the configuration."""
-    config = load_models_config()
+    index = load_url_index()
     
-    if not config:
+    if not index:
         print("❌ Could not load models configuration")
         return
     
     # Build set of known model filenames
-    known_models = set()
-    for category, items in config.items():
-        for item in items:
-            if isinstance(item, str):
-                url = item
-            elif isinstance(item, dict):
-                url = item.get('url', '')
-            else:
-                continue
-            
-            parsed_url = urlparse(url)
-            filename = parsed_url.path.split("/")[-1] if parsed_url.path else ""
-            if filename:
-                known_models.add(filename.lower())
+    known_models = frozenset(
+        entry['filename'].lower() for entry in index if entry['filename']
+    )
     
-    # Scan for unknown models
+    # Scan for unknown models, keeping the size from the scan's cached stat
     models_dir = get_models_dir(base_dir)
     unknown_models = []
     
-    for category_dir in models_dir.iterdir():
-        if not category_dir.is_dir():
-            continue
-        
-        for file in category_dir.glob('*'):
-            if file.is_file() and file.name.lower() not in known_models:
-                unknown_models.append(file)
+    for entry in iter_category_files(models_dir):
+        if entry.name.lower() not in known_models:
+            unknown_models.append((Path(entry.path), entry.stat().st_size))
     
     if not unknown_models:
         print("✅ No unused models found")
@@ -316,26 +387,24 @@ def prune_unused_models(base_dir: Path = Path("/workspace"), dry_run: bool = Tru
     print(f"⚠️  Found {len(unknown_models)} unused models:")
     print("=" * 80)
     
-    total_size = 0
-    for model in unknown_models:
-        size_mb = model.stat().st_size / (1024 * 1024)
-        total_size += size_mb
-        print(f"  • {model.name:<60} {size_mb:>10.1f} MB")
+    total_bytes = 0
+    for model, size in unknown_models:
+        total_bytes += size
+        print(f"  • {model.name:<60} {size / (1024 * 1024):>10.1f} MB")
     
+    total_size = total_bytes / (1024 * 1024)
     print("=" * 80)
     print(f"Total: {len(unknown_models)} files, {total_size:.1f} MB ({total_size/1024:.2f} GB)")
     
     if dry_run:
         print("\n💡 This was a dry run. Use '--no-dry-run' to actually remove files.")
     else:
-        if sys.stdin.isatty():
-            response = input("\n⚠️  Remove all unused models? [y/N]: ")
-            if response.lower() != 'y':
-                print("❌ Cancelled")
-                return
+        if not confirm("\n⚠️  Remove all unused models? [y/N]: "):
+            print("❌ Cancelled")
+            return
         
         removed = 0
-        for model in unknown_models:
+        for model, _ in unknown_models:
             try:
                 model.unlink()
                 removed += 1
@@ -347,28 +416,17 @@ def prune_unused_models(base_dir: Path = Path("/workspace"), dry_run: bool = Tru
 
 def search_models(query: str):
     """Search for models in configuration."""
-    config = load_models_config()
+    index = load_url_index()
     
-    if not config:
+    if not index:
         print("❌ Could not load models configuration")
         return
     
     matches = []
     
-    for category, items in config.items():
-        for item in items:
-            if isinstance(item, str):
-                url = item
-            elif isinstance(item, dict):
-                url = item.get('url', '')
-            else:
-                continue
-            
-            parsed_url = urlparse(url)
-            filename = parsed_url.path.split("/")[-1] if parsed_url.path else ""
-            
-            if query.lower() in filename.lower():
-                matches.append((category, filename, url))
+    for entry in index:
+        if query.lower() in entry['filename'].lower():
+            matches.append((entry['category'], entry['filename'], entry['url']))
     
     if not matches:
         print(f"❌ No models found matching '{query}'")
@@ -388,54 +446,35 @@ def update_models(base_dir: Path = Path("/workspace")):
     print("🔄 Updating all models...")
     print("⚠️  This will re-download all installed models")
     
-    if sys.stdin.isatty():
-        response = input("Continue? [y/N]: ")
-        if response.lower() != 'y':
-            print("❌ Cancelled")
-            return
+    if not confirm("Continue? [y/N]: "):
+        print("❌ Cancelled")
+        return
     
     # Import download functionality
-    sys.path.insert(0, str(Path(__file__).parent))
-    try:
-        import download_models
-        
-        downloader = download_models.ComfyUIModelDownloader(base_dir=str(base_dir))
-        
-        # Load models with checksums
-        models_with_checksums = download_models.load_models_with_checksums()
-        
-        if not models_with_checksums:
-            print("❌ No models to update")
-            return
-        
-        # Filter to only installed models
-        models_dir = get_models_dir(base_dir)
-        installed_models = []
-        
-        for model_info in models_with_checksums:
-            url = model_info.get('url')
-            parsed_url = urlparse(url)
-            filename = parsed_url.path.split("/")[-1] if parsed_url.path else ""
-            
-            # Check if model exists
-            found = False
-            for category_dir in models_dir.iterdir():
-                if (category_dir / filename).exists():
-                    found = True
-                    break
-            
-            if found:
-                installed_models.append(model_info)
-        
-        if not installed_models:
-            print("✅ No installed models to update")
-            return
-        
-        print(f"📥 Updating {len(installed_models)} models...")
-        downloader.download_all_models_parallel(installed_models)
-        
-    finally:
-        sys.path.pop(0)
+    download_models = load_download_module()
+    
+    downloader = download_models.ComfyUIModelDownloader(base_dir=str(base_dir))
+    
+    # Load models with checksums
+    index = load_url_index()
+    
+    if not index:
+        print("❌ No models to update")
+        return
+    
+    # Filter to only installed models
+    models_dir = get_models_dir(base_dir)
+    installed_files = {entry.name for entry in iter_category_files(models_dir)}
+    installed_models = [
+        entry['model'] for entry in index if entry['filename'] in installed_files
+    ]
+    
+    if not installed_models:
+        print("✅ No installed models to update")
+        return
+    
+    print(f"📥 Updating {len(installed_models)} models...")
+    downloader.download_all_models_parallel(installed_models)
 
 
 def main():
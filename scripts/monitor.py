@@ -8,13 +8,16 @@ Usage:
 """
 
 import argparse
+import atexit
 import json
+import os
 import time
 import signal
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Dict, List
 import requests
+from requests.adapters import HTTPAdapter
 
 try:
     import pynvml
@@ -30,6 +33,27 @@ try:
 except ImportError:
     PROMETHEUS_AVAILABLE = False
 
+# orjson serializes log entries several times faster than the stdlib
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+LOG_MAX_BYTES = 10_000_000  # Rotate monitor.log once it reaches this size
+LOG_BACKUP_COUNT = 3  # Rotated logs kept as monitor.log.1 ... monitor.log.3
+
+# Compact separators match orjson's output and keep log lines short
+_json_encode = json.JSONEncoder(separators=(',', ':')).encode
+
+
+def json_line(entry: Dict) -> bytes:
+    """Serialize a log entry as one newline-terminated JSON line."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE)
+    return (_json_encode(entry) + '\n').encode('utf-8')
+
 
 class GPUMonitor:
     """Monitor GPU statistics and ComfyUI workflow execution."""
@@ -39,7 +63,8 @@ class GPUMonitor:
         interval: int = 5,
         log_file: Optional[Path] = None,
         prometheus_port: Optional[int] = None,
-        comfyui_url: str = "http://localhost:8188"
+        comfyui_url: str = "http://localhost:8188",
+        lightweight: bool = False
     ):
         """
         Initialize GPU monitor.
@@ -49,6 +74,8 @@ class GPUMonitor:
             log_file: Path to log file
             prometheus_port: Port for Prometheus metrics server (optional)
             comfyui_url: ComfyUI API URL
+            lightweight: Only set up what a single get_summary() call needs
+                (no log file, Prometheus server or signal handlers)
         """
         self.interval = interval
         self.log_file = log_file or Path("/workspace/logs/monitor.log")
@@ -56,15 +83,38 @@ class GPUMonitor:
         self.comfyui_url = comfyui_url
         self.running = True
         
-        # Ensure log directory exists
-        self.log_file.parent.mkdir(parents=True, exist_ok=True)
+        # Keep the connection to ComfyUI alive between polls; a failed poll is
+        # simply retried on the next tick
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0)
+        self.http.mount('http://', adapter)
+        self.http.mount('https://', adapter)
+        
+        # Keep the log open for the whole run instead of reopening it every tick
+        self._log_fh = None
+        self._log_size = 0
+        if not lightweight:
+            # Ensure log directory exists
+            self.log_file.parent.mkdir(parents=True, exist_ok=True)
+            self._open_log()
+            atexit.register(self._close_log)
         
         # Initialize NVML if available
+        self.gpu_handles = []
+        self.gpu_names = []
         if PYNVML_AVAILABLE:
             try:
                 pynvml.nvmlInit()
                 self.device_count = pynvml.nvmlDeviceGetCount()
                 print(f"✅ Detected {self.device_count} GPU(s)")
+                # Handles and names never change, so look them up once instead of every tick
+                for i in range(self.device_count):
+                    handle = pynvml.nvmlDeviceGetHandleByIndex(i)
+                    name = pynvml.nvmlDeviceGetName(handle)
+                    if isinstance(name, bytes):
+                        name = name.decode('utf-8')
+                    self.gpu_handles.append(handle)
+                    self.gpu_names.append(name)
             except Exception as e:
                 print(f"❌ Failed to initialize NVML: {e}")
                 self.device_count = 0
@@ -73,7 +123,7 @@ class GPUMonitor:
         
         # Initialize Prometheus metrics if enabled
         self.prometheus_metrics = {}
-        if prometheus_port and PROMETHEUS_AVAILABLE:
+        if prometheus_port and PROMETHEUS_AVAILABLE and not lightweight:
             self._init_prometheus_metrics()
             try:
                 start_http_server(prometheus_port)
@@ -82,8 +132,9 @@ class GPUMonitor:
                 print(f"❌ Failed to start Prometheus server: {e}")
         
         # Setup signal handlers for graceful shutdown
-        signal.signal(signal.SIGINT, self._signal_handler)
-        signal.signal(signal.SIGTERM, self._signal_handler)
+        if not lightweight:
+            signal.signal(signal.SIGINT, self._signal_handler)
+            signal.signal(signal.SIGTERM, self._signal_handler)
     
     def _init_prometheus_metrics(self):
         """Initialize Prometheus metrics gauges and counters."""
@@ -99,6 +150,40 @@ class GPUMonitor:
             'queue_running': Gauge('comfyui_queue_running', 'Number of running queue items'),
         }
     
+    def _open_log(self):
+        """Open the log file unbuffered, so each entry goes out in a single append write."""
+        try:
+            self._log_fh = open(self.log_file, 'ab', buffering=0)
+            self._log_size = os.fstat(self._log_fh.fileno()).st_size
+        except OSError as e:
+            print(f"⚠️  Error opening log file: {e}")
+            self._log_fh = None
+    
+    def _close_log(self):
+        """Close the log file if it is open."""
+        if self._log_fh is not None:
+            self._log_fh.close()
+            self._log_fh = None
+    
+    def _rotate_log(self):
+        """Shift monitor.log to monitor.log.1 (and older backups up by one) and reopen it."""
+        self._close_log()
+        try:
+            for i in range(LOG_BACKUP_COUNT - 1, 0, -1):
+                backup = Path(f"{self.log_file}.{i}")
+                if backup.exists():
+                    os.replace(backup, f"{self.log_file}.{i + 1}")
+            os.replace(self.log_file, f"{self.log_file}.1")
+        except OSError as e:
+            # E.g. an outside logrotate moved the file, or the directory is read-only.
+            # Keep appending to the reopened file and retry after another LOG_MAX_BYTES,
+            # instead of retrying (and failing) on every tick
+            print(f"⚠️  Error rotating log file: {e}")
+            self._open_log()
+            self._log_size = 0
+            return
+        self._open_log()
+    
     def _signal_handler(self, signum, frame):
         """Handle shutdown signals gracefully."""
         print(f"\n🛑 Received signal {signum}, shutting down...")
@@ -115,15 +200,8 @@ class GPUMonitor:
             return []
         
         stats = []
-        for i in range(self.device_count):
+        for i, (handle, name) in enumerate(zip(self.gpu_handles, self.gpu_names)):
             try:
-                handle = pynvml.nvmlDeviceGetHandleByIndex(i)
-                
-                # Get GPU name
-                name = pynvml.nvmlDeviceGetName(handle)
-                if isinstance(name, bytes):
-                    name = name.decode('utf-8')
-                
                 # Get utilization
                 utilization = pynvml.nvmlDeviceGetUtilizationRates(handle)
                 
@@ -179,7 +257,7 @@ class GPUMonitor:
             Dict with queue info or None if unavailable
         """
         try:
-            response = requests.get(f"{self.comfyui_url}/queue", timeout=5)
+            response = self.http.get(f"{self.comfyui_url}/queue", timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 
@@ -214,11 +292,15 @@ class GPUMonitor:
         }
         
         # Write to log file
-        try:
-            with open(self.log_file, 'a') as f:
-                f.write(json.dumps(log_entry) + '\n')
-        except Exception as e:
-            print(f"⚠️  Error writing to log file: {e}")
+        if self._log_fh is not None:
+            try:
+                line = json_line(log_entry)
+                if self._log_size + len(line) > LOG_MAX_BYTES:
+                    self._rotate_log()
+                self._log_fh.write(line)
+                self._log_size += len(line)
+            except Exception as e:
+                print(f"⚠️  Error writing to log file: {e}")
         
         # Print to stdout (formatted)
         print(f"\n[{timestamp}]")
@@ -246,6 +328,9 @@ class GPUMonitor:
         print(f"📋 Logging to: {self.log_file}")
         print("Press Ctrl+C to stop\n")
         
+        # Ticks are scheduled on the monotonic clock, so the time spent collecting
+        # stats does not push every later sample back
+        next_tick = time.monotonic()
         while self.running:
             try:
                 # Collect stats
@@ -260,14 +345,20 @@ class GPUMonitor:
                 # Log stats
                 self.log_stats(stats)
                 
-                # Sleep until next interval
-                time.sleep(self.interval)
-                
             except Exception as e:
                 print(f"❌ Error in monitoring loop: {e}")
-                time.sleep(self.interval)
+            
+            # Sleep until next interval; if a tick overran, start again from now
+            next_tick += self.interval
+            sleep_for = next_tick - time.monotonic()
+            if sleep_for > 0:
+                time.sleep(sleep_for)
+            else:
+                next_tick = time.monotonic()
         
         # Cleanup
+        self._close_log()
+        
         if PYNVML_AVAILABLE:
             try:
                 pynvml.nvmlShutdown()
@@ -355,7 +446,8 @@ Examples:
         interval=args.interval,
         log_file=args.log_file,
         prometheus_port=args.prometheus_port,
-        comfyui_url=args.comfyui_url
+        comfyui_url=args.comfyui_url,
+        lightweight=args.summary
     )
     
     if args.summary:
@@ -5,9 +5,27 @@ Applies various performance optimizations including torch.compile
 """
 
 import os
+import re
 import sys
+from functools import lru_cache
 import torch
 
+# packaging understands dev and local builds such as 2.1.0a0+git1234 or 2.3.0.dev20240101
+try:
+    from packaging.version import Version
+    PACKAGING_AVAILABLE = True
+except ImportError:
+    PACKAGING_AVAILABLE = False
+
+
+def parse_version(version):
+    """Parse a version string into something comparable, ignoring any +local suffix."""
+    release = str(version).split('+')[0]
+    if PACKAGING_AVAILABLE:
+        return Version(release)
+    # Fallback: compare the leading numeric components only
+    return tuple(int(part) for part in re.findall(r'\d+', release)[:3])
+
 def apply_torch_compile_optimizations():
     """Apply torch.compile optimizations if supported."""
     if not torch.cuda.is_available():
@@ -16,10 +34,8 @@ def apply_torch_compile_optimizations():
     
     # Check PyTorch version (torch.compile requires PyTorch 2.0+)
     torch_version = torch.__version__
-    major_version = int(torch_version.split('.')[0])
-    minor_version = int(torch_version.split('.')[1])
     
-    if major_version < 2 or (major_version == 2 and minor_version < 0):
+    if parse_version(torch_version) < parse_version("2.0"):
         print(f"⚠️  PyTorch {torch_version} does not support torch.compile (requires 2.0+)")
         return False
     
@@ -36,17 +52,48 @@ def apply_torch_compile_optimizations():
     
     return True
 
+def compile_model(module, dynamic=True):
+    """
+    Wrap a model (or a submodule such as a UNet or VAE block) in torch.compile.
+    
+    ComfyUI changes batch size and resolution all the time, so shapes are
+    compiled as dynamic instead of recompiling for every new size, and CUDA
+    graphs are left off because they need static shapes. Returns the module
+    unchanged when torch.compile is not available (PyTorch < 2.0).
+    """
+    if not hasattr(torch, "compile"):
+        return module
+    
+    from torch import _dynamo
+    # Leave room for the guard variants a few resolutions produce before Dynamo gives up
+    _dynamo.config.cache_size_limit = 128
+    
+    return torch.compile(
+        module,
+        mode="max-autotune-no-cudagraphs",
+        fullgraph=False,
+        dynamic=dynamic,
+    )
+
+# Backend flags and environment variables are process-wide, so applying them again
+# is pointless; re-setting cuDNN flags can also throw away its benchmark plans
+@lru_cache(maxsize=1)
 def apply_backend_optimizations():
     """Apply backend-level optimizations."""
     print("🔧 Applying backend optimizations...")
     
-    # CUDNN optimizations
-    torch.backends.cudnn.benchmark = True
-    torch.backends.cudnn.deterministic = False
+    # CUDNN optimizations. Benchmark mode autotunes every new input shape, which
+    # only pays off when resolutions stay fixed; deterministic mode disables it.
+    deterministic = os.getenv("COMFYUI_CUDNN_DETERMINISTIC", "0") == "1"
+    benchmark = os.getenv("COMFYUI_CUDNN_BENCHMARK", "1") == "1" and not deterministic
+    torch.backends.cudnn.benchmark = benchmark
+    torch.backends.cudnn.deterministic = deterministic
     torch.backends.cudnn.allow_tf32 = True
     
     # CUDA optimizations
     torch.backends.cuda.matmul.allow_tf32 = True
+    if hasattr(torch.backends.cuda.matmul, "allow_bf16_reduced_precision_reduction"):
+        torch.backends.cuda.matmul.allow_bf16_reduced_precision_reduction = True
     
     # Memory optimizations
     if hasattr(torch.cuda, 'set_per_process_memory_fraction'):
@@ -55,13 +102,17 @@ def apply_backend_optimizations():
     
     print("✅ Backend optimizations applied")
     print(f"   CUDNN benchmark: {torch.backends.cudnn.benchmark}")
+    print(f"   CUDNN deterministic: {torch.backends.cudnn.deterministic}")
     print(f"   TF32 enabled: {torch.backends.cuda.matmul.allow_tf32}")
 
+@lru_cache(maxsize=1)
 def apply_environment_optimizations():
     """Set environment variables for performance."""
     optimizations = {
-        # PyTorch memory management
-        "PYTORCH_CUDA_ALLOC_CONF": "max_split_size_mb:1024,expandable_segments:True",
+        # PyTorch memory management. Do not add max_split_size_mb here: combined with
+        # expandable segments it makes the allocator cudaFree an expandable segment
+        # and fail with "INTERNAL ASSERT FAILED ... !block->expandable_segment_"
+        "PYTORCH_CUDA_ALLOC_CONF": "expandable_segments:True",
         
         # TF32 optimization
         "TORCH_ALLOW_TF32_CUBLAS_OVERRIDE": "1",
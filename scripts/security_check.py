@@ -9,11 +9,126 @@ Usage:
 
 import argparse
 import json
+import os
 import sys
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import List, Optional
 from urllib.parse import urlparse
 
+# Suspicious words in custom node names, as one alternation so each name is searched once
+SUSPICIOUS_NODE_NAME_RE = re.compile(r'backdoor|malware|keylog|exploit|hack')
+
+# Files and directories considered by scan_for_secrets
+SECRET_SCAN_EXTENSIONS = ('.py', '.json', '.yaml', '.yml')
+SECRET_SCAN_SKIP_DIRS = frozenset(('.git', '__pycache__', 'node_modules'))
+SECRET_SCAN_CHUNKSIZE = 32  # Files handed to a worker process at a time
+
+# orjson parses the config files several times faster than the stdlib
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Common secret patterns
+SECRET_PATTERNS = (
+    (r'api[_-]?key[\s]*=[\s]*["\']([^"\']+)["\']', 'API Key'),
+    (r'password[\s]*=[\s]*["\']([^"\']+)["\']', 'Password'),
+    (r'secret[\s]*=[\s]*["\']([^"\']+)["\']', 'Secret'),
+    (r'token[\s]*=[\s]*["\']([^"\']+)["\']', 'Token'),
+    (r'sk-[a-zA-Z0-9]{48}', 'OpenAI API Key'),
+    (r'hf_[a-zA-Z0-9]{32,}', 'Hugging Face Token'),
+)
+# Compiled as bytes patterns so files are scanned without decoding them first
+SECRET_REGEXES = tuple(
+    (re.compile(pattern.encode(), re.IGNORECASE), secret_type)
+    for pattern, secret_type in SECRET_PATTERNS
+)
+# Every pattern needs one of these substrings (lowercased), checked before any regex runs
+SECRET_NEEDLES = (b'api', b'password', b'secret', b'token', b'sk-', b'hf_')
+# All patterns in one alternation: a single pass rejects the (usual) file without secrets
+SECRET_PREFILTER = re.compile(
+    "|".join(f"(?:{pattern})" for pattern, _ in SECRET_PATTERNS).encode(), re.IGNORECASE
+)
+
+
+def load_json_file(path: Path):
+    """Parse a JSON file, using orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(path.read_bytes())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def iter_secret_scan_files(directory):
+    """
+    Yield os.DirEntry objects for the files scan_for_secrets should read.
+    
+    One walk covers every extension, and skipped directories are never entered.
+    """
+    stack = [directory]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            # Unreadable directories are skipped, as os.walk does by default
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SECRET_SCAN_SKIP_DIRS:
+                        stack.append(entry.path)
+                elif entry.name.endswith(SECRET_SCAN_EXTENSIONS) and entry.is_file():
+                    yield entry
+
+
+def scan_file_for_secrets(file_path: str) -> Optional[List[str]]:
+    """
+    Scan one file for potential secrets.
+    
+    Returns:
+        The secret type of every match, or None if the file can't be read
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+    except Exception:
+        return None
+    
+    # Plain substring searches are far cheaper than the regexes and rule out most files
+    lowered = raw.lower()
+    if not any(needle in lowered for needle in SECRET_NEEDLES):
+        return []
+    
+    if not SECRET_PREFILTER.search(raw):
+        return []
+    
+    return [
+        secret_type
+        for regex, secret_type in SECRET_REGEXES
+        for _ in regex.finditer(raw)
+    ]
+
+
+def scan_files_for_secrets(paths: List[str]) -> List[Optional[List[str]]]:
+    """
+    Run scan_file_for_secrets over paths, in worker processes when there are enough files.
+    
+    Regex scanning holds the GIL, so large trees are spread across processes,
+    but never more than there are chunks of files to hand out.
+    """
+    workers = min(os.cpu_count() or 1, -(-len(paths) // SECRET_SCAN_CHUNKSIZE))
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(scan_file_for_secrets, paths, chunksize=SECRET_SCAN_CHUNKSIZE))
+        except (OSError, ImportError):
+            # The pool needs POSIX semaphores, which containers without /dev/shm lack
+            pass
+    return list(map(scan_file_for_secrets, paths))
+
 
 class SecurityChecker:
     """Security checker for ComfyUI configuration and deployment."""
@@ -67,8 +182,7 @@ class SecurityChecker:
             return False
         
         try:
-            with open(models_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = load_json_file(models_file)
             
             http_urls = []
             for category, items in data.items():
@@ -114,8 +228,7 @@ class SecurityChecker:
             return False
         
         try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = load_json_file(config_file)
             
             nodes = data.get('nodes', [])
             issues_found = False
@@ -133,21 +246,13 @@ class SecurityChecker:
                     )
                     issues_found = True
                 
-                # Check for suspicious patterns in node names
-                suspicious_patterns = [
-                    r'backdoor',
-                    r'malware',
-                    r'keylog',
-                    r'exploit',
-                    r'hack',
-                ]
-                
-                for pattern in suspicious_patterns:
-                    if re.search(pattern, name.lower()):
-                        self.add_warning(
-                            "Custom Nodes",
-                            f"Node '{name}' contains suspicious pattern: {pattern}"
-                        )
+                # Check for suspicious patterns in node names (each reported once)
+                matches = SUSPICIOUS_NODE_NAME_RE.findall(name.lower())
+                for pattern in dict.fromkeys(matches):
+                    self.add_warning(
+                        "Custom Nodes",
+                        f"Node '{name}' contains suspicious pattern: {pattern}"
+                    )
             
             if not issues_found:
                 self.add_pass("Custom Nodes", f"Checked {len(nodes)} custom nodes ✓")
@@ -173,10 +278,12 @@ class SecurityChecker:
         issues_found = False
         
         for path in sensitive_paths:
-            if not path.exists():
+            # One stat per path instead of exists() followed by stat()
+            try:
+                stat_info = path.stat()
+            except FileNotFoundError:
                 continue
             
-            stat_info = path.stat()
             mode = stat_info.st_mode & 0o777
             
             # Check if world-readable/writable
@@ -255,47 +362,30 @@ class SecurityChecker:
         Returns:
             True if no secrets found
         """
-        # Common secret patterns
-        secret_patterns = [
-            (r'api[_-]?key[\s]*=[\s]*["\']([^"\']+)["\']', 'API Key'),
-            (r'password[\s]*=[\s]*["\']([^"\']+)["\']', 'Password'),
-            (r'secret[\s]*=[\s]*["\']([^"\']+)["\']', 'Secret'),
-            (r'token[\s]*=[\s]*["\']([^"\']+)["\']', 'Token'),
-            (r'sk-[a-zA-Z0-9]{48}', 'OpenAI API Key'),
-            (r'hf_[a-zA-Z0-9]{32,}', 'Hugging Face Token'),
-        ]
-        
         issues_found = False
         files_scanned = 0
         
-        # Scan Python and JSON files
-        for ext in ['*.py', '*.json', '*.yaml', '*.yml']:
-            for file_path in directory.rglob(ext):
-                # Skip large files and certain directories
-                if file_path.stat().st_size > 1_000_000:  # 1MB
-                    continue
-                if any(part in str(file_path) for part in ['.git', '__pycache__', 'node_modules']):
-                    continue
-                
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                    
-                    files_scanned += 1
-                    
-                    for pattern, secret_type in secret_patterns:
-                        matches = re.finditer(pattern, content, re.IGNORECASE)
-                        for _ in matches:
-                            # Don't log the actual secret
-                            self.add_warning(
-                                "Secrets",
-                                f"Potential {secret_type} found in {file_path.name}"
-                            )
-                            issues_found = True
-                            
-                except Exception:
-                    # Skip files that can't be read
-                    continue
+        # Scan Python and JSON files, skipping large files
+        files = [
+            entry for entry in iter_secret_scan_files(directory)
+            if entry.stat().st_size <= 1_000_000  # 1MB
+        ]
+        
+        results = scan_files_for_secrets([entry.path for entry in files])
+        for entry, secret_types in zip(files, results):
+            if secret_types is None:
+                # Skip files that can't be read
+                continue
+            
+            files_scanned += 1
+            
+            for secret_type in secret_types:
+                # Don't log the actual secret
+                self.add_warning(
+                    "Secrets",
+                    f"Potential {secret_type} found in {entry.name}"
+                )
+                issues_found = True
         
         if not issues_found and files_scanned > 0:
             self.add_pass("Secrets", f"Scanned {files_scanned} files, no secrets found ✓")
@@ -375,34 +465,39 @@ class SecurityChecker:
     
     def print_results(self):
         """Print security check results."""
-        print("\n" + "=" * 50)
-        print("📊 Security Check Results")
-        print("=" * 50)
+        # Build the report first and write it once instead of one print() per item
+        lines = [
+            "\n" + "=" * 50,
+            "📊 Security Check Results",
+            "=" * 50,
+        ]
         
         if self.passed:
-            print(f"\n✅ Passed Checks ({len(self.passed)}):")
-            for item in self.passed:
-                print(f"  • {item['category']}: {item['message']}")
+            lines.append(f"\n✅ Passed Checks ({len(self.passed)}):")
+            lines.extend(f"  • {item['category']}: {item['message']}" for item in self.passed)
         
         if self.warnings:
-            print(f"\n⚠️  Warnings ({len(self.warnings)}):")
-            for item in self.warnings:
-                print(f"  • {item['category']}: {item['message']}")
+            lines.append(f"\n⚠️  Warnings ({len(self.warnings)}):")
+            lines.extend(f"  • {item['category']}: {item['message']}" for item in self.warnings)
         
         if self.issues:
-            print(f"\n❌ Issues ({len(self.issues)}):")
-            for item in self.issues:
-                severity = item['severity']
-                print(f"  • [{severity}] {item['category']}: {item['message']}")
+            lines.append(f"\n❌ Issues ({len(self.issues)}):")
+            lines.extend(
+                f"  • [{item['severity']}] {item['category']}: {item['message']}"
+                for item in self.issues
+            )
         
-        print("\n" + "=" * 50)
+        lines.append("\n" + "=" * 50)
         
         if not self.issues:
-            print("✅ No critical security issues found!")
-            return 0
+            lines.append("✅ No critical security issues found!")
+            exit_code = 0
         else:
-            print("❌ Security issues found - please review!")
-            return 1
+            lines.append("❌ Security issues found - please review!")
+            exit_code = 1
+        
+        sys.stdout.write("\n".join(lines) + "\n")
+        return exit_code
 
 
 def main():
@@ -4,16 +4,30 @@ Link Verification Script for ComfyUI Models Library
 Verifies all Hugging Face links for accessibility and correctness.
 """
 
+import argparse
 import json
+import mmap
 import os
 import re
 import sys
 import time
+from collections import Counter
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
 from urllib.parse import urlsplit, urlunsplit
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# orjson parses and serializes JSON several times faster than the stdlib
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 
 def validate_hf_token():
@@ -44,48 +58,124 @@ def validate_hf_token():
 
 HF_TOKEN = validate_hf_token()
 
+MAX_ALLOWED_WORKERS = 32
+
 SESSION = requests.Session()
 SESSION.headers.update({"User-Agent": "ComfyUI-Model-Link-Checker/1.0"})
 
+# urllib3 keeps only 10 connections per host by default; size the pool for the largest
+# worker count so parallel checks reuse keep-alive connections instead of re-handshaking.
+# Mounted once, so connections opened before the fan-out (the latency probe) stay pooled.
+# Throttling and gateway errors get two quick retries; the last response is returned
+# rather than raised, so a link that stays throttled is reported with its status code.
+_adapter = HTTPAdapter(
+    pool_maxsize=MAX_ALLOWED_WORKERS,
+    max_retries=Retry(
+        total=2,
+        backoff_factor=0.3,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=("HEAD", "GET"),
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    ),
+)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
 if HF_TOKEN:
     SESSION.headers["Authorization"] = f"Bearer {HF_TOKEN}"
 else:
     print("ℹ️  No HF_TOKEN set. Protected Hugging Face links may fail.")
 
 
-def extract_huggingface_links(content):
-    """Extracts all Hugging Face links from the markdown content."""
-    # Regex for Hugging Face links (https://huggingface.co/...)
-    hf_pattern = r"https://huggingface\.co/[^\s\)]+"
-    links = re.findall(hf_pattern, content)
+# Hugging Face links (https://huggingface.co/...) whose path ends in a model extension,
+# optionally followed by a query or fragment. Links stop at whitespace, a closing
+# parenthesis, quotes or angle brackets, so markdown and HTML wrappers are not captured.
+# A bytes pattern, because it runs directly over the memory-mapped markdown file.
+HF_DOWNLOAD_LINK_RE = re.compile(
+    rb"https://huggingface\.co/[^\s)\"'`<>?#]*"
+    rb"(?i:\.safetensors|\.ckpt|\.pth|\.bin|\.pt)(?![^\s)\"'`<>?#])"
+    rb"(?:[?#][^\s)\"'`<>]*)?"
+)
 
-    # Filter only actual download links (safetensors, ckpt, etc.)
-    download_links = []
-    for link in links:
-        if any(ext in link.lower() for ext in [".safetensors", ".ckpt", ".pth", ".bin", ".pt"]):
-            download_links.append(link)
 
-    return download_links
+def extract_huggingface_links_from_file(path):
+    """
+    Extracts all Hugging Face links from a markdown file.
 
+    The file is memory-mapped and matched as bytes, so it is never read
+    into a string; only the matched links are decoded.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []  # Empty files cannot be mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return [
+                match.group(0).decode("utf-8", errors="replace")
+                for match in HF_DOWNLOAD_LINK_RE.finditer(mapped)
+            ]
+
+
+# Only these hosts are checked; anything else is reported without a request
+HF_LINK_PREFIXES = ("https://huggingface.co/", "https://cdn-lfs.huggingface.co/")
+
+
+# Hugging Face answers 200/206 for files, redirects LFS objects with 302/307,
+# and 304 when a conditional request finds the file unchanged
+HF_OK_STATUS_CODES = frozenset((200, 206, 302, 304, 307))
 
-def check_link(link, timeout=10):
-    """Checks a single link."""
-    try:
-        # Remove query parameters for a clean URL while preserving path normalization
-        parsed = urlsplit(link)
-        clean_link = urlunsplit((parsed.scheme, parsed.netloc, parsed.path, "", ""))
 
-        # HEAD request for faster verification
-        response = SESSION.head(clean_link, timeout=timeout, allow_redirects=True)
+# Cached because main() cleans each link for the cache lookups as well as in check_link
+@lru_cache(maxsize=4096)
+def clean_url(link):
+    """Removes query parameters and fragments from a link while preserving its path."""
+    parsed = urlsplit(link)
+    return urlunsplit((parsed.scheme, parsed.netloc, parsed.path, "", ""))
+
+
+def check_link(link, timeout=10, etag=None):
+    """
+    Checks a single link.
+
+    With the ETag from an earlier successful check, the request is conditional
+    and an unchanged file answers 304 Not Modified.
+    """
+    if not link.startswith(HF_LINK_PREFIXES):
+        return {
+            "link": link,
+            "status": "invalid",
+            "status_code": None,
+            "final_url": None,
+            "error": "Not a Hugging Face link",
+        }
 
-        # For Hugging Face: 200, 302, 307 are OK
-        if response.status_code in [200, 302, 307]:
+    try:
+        clean_link = clean_url(link)
+
+        # A one-byte ranged GET; the CDN rejects HEAD for some redirected LFS files.
+        # stream=True plus closing the response means only the headers are read.
+        headers = {"Range": "bytes=0-0"}
+        if etag:
+            headers["If-None-Match"] = etag
+        with SESSION.get(
+            clean_link,
+            headers=headers,
+            stream=True,
+            timeout=timeout,
+            allow_redirects=True,
+        ) as response:
+            pass
+        if response.status_code == 405:
+            response = SESSION.head(clean_link, timeout=timeout, allow_redirects=True)
+
+        if response.status_code in HF_OK_STATUS_CODES:
             return {
                 "link": link,
                 "status": "valid",
                 "status_code": response.status_code,
                 "final_url": response.url,
                 "error": None,
+                "etag": response.headers.get("ETag") or etag,
             }
         else:
             return {
@@ -122,25 +212,37 @@ def check_link(link, timeout=10):
         }
 
 
-def verify_links_parallel(links, max_workers=10):
-    """Verifies links in parallel."""
+def verify_links_parallel(links, max_workers=10, etags=None):
+    """Verifies links in parallel, revalidating with known ETags (keyed by clean URL)."""
     results = []
+    etags = etags or {}
 
     print(f"🔍 Checking {len(links)} links with {max_workers} parallel requests...")
 
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         # Submit all tasks
-        future_to_link = {executor.submit(check_link, link): link for link in links}
+        future_to_link = {
+            executor.submit(check_link, link, etag=etags.get(clean_url(link))): link
+            for link in links
+        }
 
         # Collect results as they complete
+        valid = 0
+        last_print = 0.0
+        # Carriage-return redraws only make sense on a terminal; in Docker or CI logs
+        # each one is kept, so only the final line is written there
+        interactive = sys.stdout.isatty()
         for future in as_completed(future_to_link):
             result = future.result()
             results.append(result)
+            valid += result["status"] == "valid"
 
-            # Progress indicator
-            valid = sum(1 for r in results if r["status"] == "valid")
+            # Progress indicator, redrawn at most every 0.2s and once at the end
             total = len(results)
-            print(f"\r📊 Progress: {total}/{len(links)} - ✅ {valid} valid", end="", flush=True)
+            if total == len(links) or interactive and time.monotonic() - last_print >= 0.2:
+                last_print = time.monotonic()
+                sys.stdout.write(f"\r📊 Progress: {total}/{len(links)} - ✅ {valid} valid")
+                sys.stdout.flush()
 
     print()  # New line after progress
     return results
@@ -148,18 +250,11 @@ def verify_links_parallel(links, max_workers=10):
 
 def analyze_results(results):
     """Analyzes the verification results."""
-    stats = {"valid": 0, "invalid": 0, "timeout": 0, "connection_error": 0, "error": 0}
-
-    invalid_links = []
-    valid_links = []
+    counts = Counter(result["status"] for result in results)
+    stats = {status: counts[status] for status in ("valid", "invalid", "timeout", "connection_error", "error")}
 
-    for result in results:
-        stats[result["status"]] += 1
-
-        if result["status"] == "valid":
-            valid_links.append(result["link"])
-        else:
-            invalid_links.append(result)
+    valid_links = [result["link"] for result in results if result["status"] == "valid"]
+    invalid_links = [result for result in results if result["status"] != "valid"]
 
     return stats, valid_links, invalid_links
 
@@ -207,7 +302,7 @@ def get_max_workers():
     """
     max_workers_env = os.getenv("MAX_WORKERS")
     default_workers = 5
-    max_allowed_workers = 32
+    max_allowed_workers = MAX_ALLOWED_WORKERS
 
     try:
         if max_workers_env is None:
@@ -230,20 +325,112 @@ def get_max_workers():
         return default_workers
 
 
+def probe_max_workers(
+    link_count, target_seconds=30, default_workers=5, max_allowed_workers=MAX_ALLOWED_WORKERS
+):
+    """
+    Pick a worker count from the round-trip time of one HEAD to Hugging Face.
+
+    Enough workers are used to finish link_count checks in about target_seconds,
+    within the same 5-32 range as MAX_WORKERS. Falls back to default_workers if
+    the probe fails. The probe also resolves DNS and opens the first pooled
+    connection, so the checks that follow start on a warm connection.
+    """
+    try:
+        start = time.monotonic()
+        SESSION.head("https://huggingface.co/", timeout=5)
+        rtt = time.monotonic() - start
+    except requests.exceptions.RequestException as e:
+        print(f"⚠️  Latency probe failed ({e})")
+        return default_workers
+
+    print(f"📡 Hugging Face round-trip {rtt * 1000:.0f}ms")
+    return max(default_workers, min(max_allowed_workers, int(link_count * rtt / target_seconds)))
+
+
+def load_json_file(path):
+    """Parse a JSON file, using orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(Path(path).read_bytes())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def dump_json_file(path, data):
+    """
+    Write data as indented UTF-8 JSON, using orjson when it is installed.
+
+    The file is written to a temporary name and renamed into place, so readers
+    never see a partially written file.
+    """
+    path = Path(path)
+    if ORJSON_AVAILABLE:
+        encoded = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        # json.dump issues a write per token when indenting; encode once and write once
+        encoded = json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(encoded)
+    os.replace(tmp_path, path)
+
+
+# Links that were valid on a previous run are not re-checked until their entry expires,
+# and are then revalidated with a conditional request against the stored ETag
+LINK_CACHE_FILE = (
+    Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache")
+    / "runpod-comfyui"
+    / "hf_link_cache.json"
+)
+DEFAULT_LINK_CACHE_TTL = 24 * 3600
+
+
+def get_link_cache_ttl():
+    """
+    Parse and validate LINK_CACHE_TTL environment variable.
+
+    Returns:
+        int: Seconds a cached valid link is trusted (0 disables the cache, default 24h).
+    """
+    ttl_env = os.getenv("LINK_CACHE_TTL")
+    if ttl_env is None:
+        return DEFAULT_LINK_CACHE_TTL
+
+    try:
+        return max(0, int(ttl_env))
+    except ValueError:
+        print(f"⚠️  Invalid LINK_CACHE_TTL format: {ttl_env}. Defaulting to {DEFAULT_LINK_CACHE_TTL}.")
+        return DEFAULT_LINK_CACHE_TTL
+
+
+def load_link_cache(cache_file=LINK_CACHE_FILE):
+    """Loads cached results of valid links, keyed by clean URL."""
+    try:
+        cache = load_json_file(cache_file)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict):
+        return {}
+
+    return {link: entry for link, entry in cache.items() if isinstance(entry, dict)}
+
+
+def save_link_cache(cache, cache_file=LINK_CACHE_FILE):
+    """Atomically writes the link cache; failures only skip caching."""
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        dump_json_file(cache_file, cache)
+    except OSError as e:
+        print(f"⚠️  Could not save link cache to {cache_file}: {e}")
+
+
 def extract_links_from_json(json_file):
     """Extracts all Hugging Face links from models_download.json."""
     try:
-        with open(json_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        links = []
-        for category, urls in data.items():
-            if isinstance(urls, list):
-                for url in urls:
-                    if isinstance(url, str) and "huggingface.co" in url:
-                        links.append(url)
-        
-        return links
+        data = load_json_file(json_file)
+
+        # Categories map to lists of URLs; anything else in the file is ignored
+        urls = chain.from_iterable(v for v in data.values() if isinstance(v, list))
+        return [url for url in urls if type(url) is str and "huggingface.co" in url]
     except Exception as e:
         print(f"❌ Error reading JSON file: {e}")
         return []
@@ -251,48 +438,35 @@ def extract_links_from_json(json_file):
 
 def main():
     """Main function."""
-    print("🔍 DEBUG: Starting link verification...")
+    parser = argparse.ArgumentParser(description="Verify Hugging Face model links")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Re-check every link, ignoring cached results"
+    )
+    args = parser.parse_args()
+
+    debug = bool(os.getenv("VERIFY_DEBUG"))
+    if debug:
+        print("🔍 DEBUG: Starting link verification...")
 
     # Try JSON file first (new format), then fallback to markdown (legacy)
-    json_paths = [
+    json_paths = (
         Path("/opt/runpod/models_download.json"),  # Docker source
         Path("/workspace/models_download.json"),  # Docker destination
         Path(__file__).parent.parent / "models_download.json",  # Local dev
-    ]
-    
-    markdown_paths = [
+    )
+
+    markdown_paths = (
         Path("/opt/runpod/comfyui_models_complete_library.md"),  # Docker source
         Path("/workspace/comfyui_models_complete_library.md"),  # Docker destination
         Path(__file__).parent.parent / "comfyui_models_complete_library.md",  # Local dev
-    ]
-
-    # Try JSON first
-    source_file = None
-    file_type = None
-    
-    print("🔍 Looking for models_download.json...")
-    for path in json_paths:
-        print(f"🔍 DEBUG: Checking for JSON file at: {path}")
-        if path.exists():
-            source_file = path
-            file_type = "json"
-            print(f"✅ Found JSON file: {path}")
-            break
-    
-    # Fallback to markdown if JSON not found
-    if not source_file:
-        print("⚠️  models_download.json not found, trying markdown fallback...")
-        for path in markdown_paths:
-            print(f"🔍 DEBUG: Checking for markdown file at: {path}")
-            if path.exists():
-                source_file = path
-                file_type = "markdown"
-                print(f"✅ Found markdown file: {path}")
-                break
+    )
+
+    # Stop probing at the first file that exists
+    source_file = next((path for path in (*json_paths, *markdown_paths) if path.exists()), None)
 
     if not source_file:
         print("❌ Neither models_download.json nor comfyui_models_complete_library.md found!")
-        print("🔍 DEBUG: Tried paths:")
+        print("🔍 Tried paths:")
         print("\nJSON paths:")
         for path in json_paths:
             print(f"   {path} - {'EXISTS' if path.exists() else 'NOT FOUND'}")
@@ -301,6 +475,11 @@ def main():
             print(f"   {path} - {'EXISTS' if path.exists() else 'NOT FOUND'}")
         sys.exit(1)
 
+    file_type = "json" if source_file.suffix == ".json" else "markdown"
+    if file_type == "markdown":
+        print("⚠️  models_download.json not found, using markdown fallback")
+    print(f"✅ Found {file_type} file: {source_file}")
+
     # Extract links based on file type
     print(f"🔍 Extracting links from {file_type} file...")
     if file_type == "json":
@@ -310,17 +489,8 @@ def main():
     else:
         try:
             print(f"📖 Reading markdown file: {source_file}")
-            with open(source_file, "r", encoding="utf-8") as f:
-                content = f.read()
-            print(f"✅ Successfully read {len(content)} characters from markdown file")
-            
-            # Debug: Show first few lines
-            lines = content.split("\n")[:10]
-            print("🔍 DEBUG: First 10 lines of markdown file:")
-            for i, line in enumerate(lines, 1):
-                print(f"   {i:2d}: {line}")
-            
-            links = extract_huggingface_links(content)
+            links = extract_huggingface_links_from_file(source_file)
+            print(f"✅ Successfully scanned {source_file.stat().st_size} bytes of markdown")
         except Exception as e:
             print(f"❌ Error reading markdown file: {e}")
             sys.exit(1)
@@ -330,11 +500,68 @@ def main():
         sys.exit(1)
 
     print(f"📎 Found: {len(links)} links")
+
+    # The library lists some files more than once; check each URL a single time
+    unique_links = list(dict.fromkeys(links))
+    if len(unique_links) < len(links):
+        print(f"🔁 Skipping {len(links) - len(unique_links)} duplicate links")
+    links = unique_links
+
+    # Reuse results for links that were valid on a recent run; older entries are
+    # re-checked with a conditional request using their ETag
+    cache_ttl = 0 if args.no_cache else get_link_cache_ttl()
+    link_cache = load_link_cache() if cache_ttl else {}
+    cutoff = time.time() - cache_ttl
+    results = []
+    unchecked_links = []
+    etags = {}
+    for link in links:
+        entry = link_cache.get(clean_url(link))
+        if entry and entry.get("timestamp", 0) > cutoff:
+            results.append(
+                {
+                    "link": link,
+                    "status": "valid",
+                    "status_code": entry.get("status_code"),
+                    "final_url": entry.get("final_url"),
+                    "error": None,
+                }
+            )
+        else:
+            unchecked_links.append(link)
+            if entry and entry.get("etag"):
+                etags[clean_url(link)] = entry["etag"]
+    if results:
+        print(f"♻️  {len(results)} links were valid within the last {cache_ttl}s, skipping them")
+
     print("🔍 Checking accessibility...")
 
-    # Verify links with configurable max_workers
+    # Verify links with configurable max_workers, sized from a latency probe when unset.
+    # The probe runs either way to warm the connection pool before the fan-out.
     max_workers = get_max_workers()
-    results = verify_links_parallel(links, max_workers=max_workers)
+    if unchecked_links:
+        probed_workers = probe_max_workers(len(unchecked_links))
+        if os.getenv("MAX_WORKERS") is None:
+            max_workers = probed_workers
+    checked = verify_links_parallel(unchecked_links, max_workers=max_workers, etags=etags)
+    for result in checked:
+        # The ETag is only needed for the cache, not in the saved results
+        etag = result.pop("etag", None)
+        if not cache_ttl:
+            continue
+        if result["status"] == "valid":
+            link_cache[clean_url(result["link"])] = {
+                "status_code": result["status_code"],
+                "final_url": result["final_url"],
+                "etag": etag,
+                "timestamp": time.time(),
+            }
+        else:
+            link_cache.pop(clean_url(result["link"]), None)
+    results.extend(checked)
+
+    if cache_ttl:
+        save_link_cache(link_cache)
 
     # Analyze results
     stats, valid_links, invalid_links = analyze_results(results)
@@ -372,18 +599,15 @@ def main():
         output_file = Path("/workspace/link_verification_results.json")
 
     try:
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(
-                {
-                    "stats": stats,
-                    "valid_links": valid_links,
-                    "invalid_links": invalid_links,
-                    "timestamp": time.time(),
-                },
-                f,
-                indent=2,
-                ensure_ascii=False,
-            )
+        dump_json_file(
+            output_file,
+            {
+                "stats": stats,
+                "valid_links": valid_links,
+                "invalid_links": invalid_links,
+                "timestamp": time.time(),
+            },
+        )
     except Exception as e:
         print(f"❌ Failed to save results to {output_file}: {e}")
         sys.exit(1)
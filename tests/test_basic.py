@@ -2,6 +2,10 @@
 Basic tests for runpod-comfyui-cloud
 """
 import os
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+
+
 def test_imports():
     """Test that basic imports work and required deps are present"""
     import requests
@@ -10,8 +14,6 @@ def test_imports():
 
 def test_project_structure():
     """Test that essential project files exist"""
-    project_root = os.path.dirname(os.path.dirname(__file__))
-    
     essential_files = [
         'README.md',
         'Dockerfile',
@@ -21,14 +23,13 @@ def test_project_structure():
     ]
     
     for file in essential_files:
-        file_path = os.path.join(project_root, file)
+        file_path = os.path.join(PROJECT_ROOT, file)
         assert os.path.exists(file_path), f"Essential file {file} is missing"
 
 
 def test_scripts_exist():
     """Test that essential scripts exist"""
-    project_root = os.path.dirname(os.path.dirname(__file__))
-    scripts_dir = os.path.join(project_root, 'scripts')
+    scripts_dir = os.path.join(PROJECT_ROOT, 'scripts')
     
     essential_scripts = [
         'setup.sh',
@@ -4,20 +4,33 @@ Tests for custom nodes installation and configuration.
 
 import json
 import pytest
+from collections import Counter
 from pathlib import Path
 
-
-@pytest.fixture
+PROJECT_ROOT = Path(__file__).parent.parent
+SCRIPTS_DIR = PROJECT_ROOT / "scripts"
+DOCS_DIR = PROJECT_ROOT / "docs"
+GIT_URL_SCHEMES = ('https://', 'git://')
+REQUIRED_NODES = (
+    'ComfyUI-Manager',
+    'ComfyUI-Impact-Pack',
+    'rgthree-comfy',
+    'ComfyUI-Advanced-ControlNet',
+    'ComfyUI-VideoHelperSuite',
+)
+REQUIRED_NODE_FIELDS = ('name', 'repo')
+
+
+@pytest.fixture(scope="module")
 def custom_nodes_config_path():
     """Path to configs/custom_nodes.json file."""
-    return Path(__file__).parent.parent / "configs" / "custom_nodes.json"
+    return PROJECT_ROOT / "configs" / "custom_nodes.json"
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def custom_nodes_data(custom_nodes_config_path):
-    """Load custom_nodes.json data."""
-    with open(custom_nodes_config_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """Load custom_nodes.json data once for all tests in this module."""
+    return json.loads(custom_nodes_config_path.read_bytes())
 
 
 def test_custom_nodes_config_exists(custom_nodes_config_path):
@@ -34,26 +47,16 @@ def test_custom_nodes_valid_structure(custom_nodes_data):
 
 def test_all_required_nodes_present(custom_nodes_data):
     """Test that all 5 required custom nodes are present."""
-    required_nodes = [
-        'ComfyUI-Manager',
-        'ComfyUI-Impact-Pack',
-        'rgthree-comfy',
-        'ComfyUI-Advanced-ControlNet',
-        'ComfyUI-VideoHelperSuite'
-    ]
-    
     node_names = [node.get('name', '') for node in custom_nodes_data['custom_nodes']]
     
-    for required in required_nodes:
+    for required in REQUIRED_NODES:
         assert required in node_names, f"Required node '{required}' not found in config"
 
 
 def test_node_entries_have_required_fields(custom_nodes_data):
     """Test that each node entry has required fields."""
-    required_fields = ['name', 'repo']
-    
     for i, node in enumerate(custom_nodes_data['custom_nodes']):
-        for field in required_fields:
+        for field in REQUIRED_NODE_FIELDS:
             assert field in node, f"Node {i} missing required field '{field}'"
             assert node[field], f"Node {i} has empty '{field}'"
 
@@ -67,7 +70,7 @@ def test_node_urls_are_valid_git_repos(custom_nodes_data):
         name = node.get('name', 'unknown')
         
         # Should be a valid git URL (HTTPS or git protocol)
-        if not (url.startswith('https://') or url.startswith('git://')):
+        if not url.startswith(GIT_URL_SCHEMES):
             invalid_urls.append(f"{name}: {url}")
         
         # Should end with .git or be a GitHub URL
@@ -79,28 +82,23 @@ def test_node_urls_are_valid_git_repos(custom_nodes_data):
 
 def test_no_duplicate_nodes(custom_nodes_data):
     """Test that there are no duplicate node names."""
-    node_names = [node.get('name', '') for node in custom_nodes_data['custom_nodes']]
-    duplicates = [name for name in node_names if node_names.count(name) > 1]
+    counts = Counter(node.get('name', '') for node in custom_nodes_data['custom_nodes'])
+    duplicates = [name for name, count in counts.items() if count > 1]
     
     assert len(duplicates) == 0, f"Found duplicate node names: {duplicates}"
 
 
 def test_install_script_exists():
     """Test that install_custom_nodes.sh script exists."""
-    install_script = Path(__file__).parent.parent / "scripts" / "install_custom_nodes.sh"
+    install_script = SCRIPTS_DIR / "install_custom_nodes.sh"
     assert install_script.exists(), "install_custom_nodes.sh script not found"
     assert install_script.stat().st_mode & 0o111, "install_custom_nodes.sh is not executable"
 
 
-def test_node_requirements_handling():
+def test_node_requirements_handling(custom_nodes_data):
     """Test that nodes with requirements are handled properly."""
     # Test that each node entry can optionally have requirements
-    custom_nodes_config_path = Path(__file__).parent.parent / "configs" / "custom_nodes.json"
-    
-    with open(custom_nodes_config_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    for node in data['custom_nodes']:
+    for node in custom_nodes_data['custom_nodes']:
         if 'requirements' in node:
             # If requirements field exists, it should be a boolean or list
             assert isinstance(node['requirements'], (bool, list)), \
@@ -109,7 +107,7 @@ def test_node_requirements_handling():
 
 def test_custom_nodes_documentation_exists():
     """Test that custom nodes documentation exists."""
-    docs_path = Path(__file__).parent.parent / "docs" / "custom-nodes.md"
+    docs_path = DOCS_DIR / "custom-nodes.md"
     assert docs_path.exists(), "docs/custom-nodes.md not found"
 
 
@@ -118,7 +116,7 @@ def test_install_script_syntax():
     """Test that install_custom_nodes.sh has valid bash syntax."""
     import subprocess
     
-    install_script = Path(__file__).parent.parent / "scripts" / "install_custom_nodes.sh"
+    install_script = SCRIPTS_DIR / "install_custom_nodes.sh"
     
     # Use bash -n to check syntax without executing
     result = subprocess.run(
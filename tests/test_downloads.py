@@ -0,0 +1,235 @@
+"""
+Tests for the model downloader against a local HTTP server.
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+SCRIPTS_DIR = PROJECT_ROOT / "scripts"
+PAYLOAD = bytes(range(251)) * 16_000  # ~4 MB; 251 is prime, so misplaced bytes never line up
+RANGE_HEADER_RE = re.compile(r'bytes=(\d+)-(\d*)')
+
+
+class FileHandler(BaseHTTPRequestHandler):
+    """
+    Serves PAYLOAD, recording every GET's Range header.
+
+    HEAD always advertises range support; honour_ranges decides whether
+    GET actually answers a Range with 206 or ignores it with a full 200.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(PAYLOAD)))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+
+    def do_GET(self):
+        range_header = self.headers.get('Range')
+        with self.server.lock:
+            self.server.requested_ranges.append(range_header)
+            cut_after = self.server.cut_after
+            self.server.cut_after = None  # Only the first body is cut short
+
+        match = RANGE_HEADER_RE.fullmatch(range_header or '')
+        if match and self.server.honour_ranges:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else len(PAYLOAD) - 1
+            if start >= len(PAYLOAD):
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{len(PAYLOAD)}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            end = min(end, len(PAYLOAD) - 1)
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(PAYLOAD)}')
+        else:
+            start, end = 0, len(PAYLOAD) - 1
+            self.send_response(200)
+
+        body = PAYLOAD[start:end + 1]
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if cut_after is not None:
+            # Promise the whole body, then drop the connection partway through
+            self.wfile.write(body[:cut_after])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture(scope="module")
+def download_models():
+    """scripts/download_models.py loaded once by file path, without touching sys.path."""
+    spec = importlib.util.spec_from_file_location("download_models", SCRIPTS_DIR / "download_models.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def file_server():
+    """A local server for PAYLOAD; tests tweak honour_ranges and cut_after before downloading."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FileHandler)
+    server.daemon_threads = True
+    server.honour_ranges = True
+    server.cut_after = None
+    server.requested_ranges = []
+    server.lock = threading.Lock()
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    )
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/model.safetensors"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def downloader(download_models, monkeypatch, tmp_path):
+    """A downloader writing below tmp_path, using the Python download paths without backoff waits."""
+    monkeypatch.setattr(download_models, "ARIA2C_PATH", None)
+    monkeypatch.setattr(download_models, "RETRY_BASE_DELAY_SECONDS", 0)
+    monkeypatch.setattr(download_models, "RETRY_MAX_DELAY_SECONDS", 0)
+    return download_models.ComfyUIModelDownloader(base_dir=tmp_path)
+
+
+def test_single_stream_resumes_after_mid_stream_disconnect(download_models, downloader, file_server, monkeypatch, tmp_path):
+    """A body cut short by the server is retried with a Range request from the bytes on disk."""
+    monkeypatch.setattr(download_models, "RANGED_DOWNLOAD_PARTS", 1)
+    # Past the first 1 MiB copy buffers, so some of the body is already on disk
+    file_server.cut_after = 2_500_000
+    target = tmp_path / "model.safetensors"
+
+    assert downloader.download_file_with_resume(file_server.url, target, retry_count=3)
+
+    assert target.read_bytes() == PAYLOAD
+    assert len(file_server.requested_ranges) == 2
+    assert file_server.requested_ranges[0] is None
+    resumed_from = int(RANGE_HEADER_RE.fullmatch(file_server.requested_ranges[1]).group(1))
+    assert 0 < resumed_from <= 2_500_000
+
+
+@pytest.fixture
+def ranged(download_models, monkeypatch):
+    """Split every download into four ranges, however small."""
+    monkeypatch.setattr(download_models, "RANGED_DOWNLOAD_MIN_SIZE", 1)
+    monkeypatch.setattr(download_models, "RANGED_DOWNLOAD_PARTS", 4)
+
+
+def test_ranged_download_fetches_all_parts(ranged, downloader, file_server, tmp_path):
+    """A fresh download is fetched as concurrent ranges and renamed into place."""
+    target = tmp_path / "model.safetensors"
+
+    assert downloader.download_file_with_resume(file_server.url, target)
+
+    assert target.read_bytes() == PAYLOAD
+    part_size = -(-len(PAYLOAD) // 4)
+    assert sorted(file_server.requested_ranges) == sorted(
+        f"bytes={start}-{min(start + part_size, len(PAYLOAD)) - 1}"
+        for start in range(0, len(PAYLOAD), part_size)
+    )
+    assert sorted(p.name for p in tmp_path.iterdir() if p.is_file()) == ["model.safetensors"]
+
+
+def test_ranged_download_falls_back_when_range_is_ignored(ranged, downloader, file_server, tmp_path):
+    """A server that answers a Range with 200 is downloaded as one stream instead."""
+    file_server.honour_ranges = False
+    target = tmp_path / "model.safetensors"
+
+    assert downloader.download_file_with_resume(file_server.url, target)
+
+    assert target.read_bytes() == PAYLOAD
+    assert file_server.requested_ranges[-1] is None
+    assert not (tmp_path / "model.safetensors.part").exists()
+    assert not (tmp_path / "model.safetensors.part.json").exists()
+
+
+def test_ranged_download_resumes_from_saved_state(ranged, downloader, file_server, tmp_path):
+    """An interrupted ranged download only fetches what .part.json says is still missing."""
+    target = tmp_path / "model.safetensors"
+    missing = [[1_000_000, 1_999_999], [3_000_000, len(PAYLOAD) - 1]]
+    partial = bytearray(PAYLOAD)
+    for start, end in missing:
+        partial[start:end + 1] = bytes(end + 1 - start)
+    (tmp_path / "model.safetensors.part").write_bytes(partial)
+    (tmp_path / "model.safetensors.part.json").write_text(json.dumps(
+        {"url": file_server.url, "size": len(PAYLOAD), "ranges": missing}
+    ))
+
+    assert downloader.download_file_with_resume(file_server.url, target)
+
+    assert target.read_bytes() == PAYLOAD
+    assert sorted(file_server.requested_ranges) == [
+        f"bytes={start}-{end}" for start, end in missing
+    ]
+    assert not (tmp_path / "model.safetensors.part.json").exists()
+
+
+def test_checksum_cache_skips_rehashing_until_file_changes(download_models, downloader, monkeypatch):
+    """A verified file is only hashed again once its size or mtime no longer match the cache."""
+    model = {
+        "url": "https://huggingface.co/org/repo/resolve/main/model.safetensors",
+        "sha256": hashlib.sha256(PAYLOAD).hexdigest(),
+    }
+    target = downloader.create_download_job(model).target_path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_bytes(PAYLOAD)
+
+    verified = []
+    verify_checksum = download_models.verify_checksum
+
+    def counting_verify(file_path, expected_checksum):
+        verified.append(file_path)
+        return verify_checksum(file_path, expected_checksum)
+
+    monkeypatch.setattr(download_models, "verify_checksum", counting_verify)
+
+    downloader.download_all_models_parallel([model])
+    assert verified == [target]
+
+    downloader.download_all_models_parallel([model])
+    assert verified == [target], "cache hit should skip hashing"
+
+    st = target.stat()
+    os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    downloader.download_all_models_parallel([model])
+    assert verified == [target, target], "changed mtime should invalidate the cache entry"
+
+
+def test_checksum_mismatch_redownloads_without_rehashing(download_models, downloader, file_server, monkeypatch):
+    """A corrupt file found before downloading is replaced, and only the new download is hashed."""
+    monkeypatch.setattr(download_models, "RANGED_DOWNLOAD_PARTS", 1)
+    model = {"url": file_server.url, "sha256": hashlib.sha256(PAYLOAD).hexdigest()}
+    target = downloader.create_download_job(model).target_path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_bytes(bytes(len(PAYLOAD)))
+
+    hashed = []
+    hash_file = download_models.hash_file
+
+    def counting_hash(file_path, algorithm="sha256"):
+        hashed.append(file_path)
+        return hash_file(file_path, algorithm)
+
+    monkeypatch.setattr(download_models, "hash_file", counting_hash)
+
+    downloader.download_all_models_parallel([model])
+
+    assert target.read_bytes() == PAYLOAD
+    assert hashed == [target], "the corrupt file should be hashed once, by the verify pool"
+    assert file_server.requested_ranges == [None]
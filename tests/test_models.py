@@ -3,22 +3,49 @@ Tests for model download system and validation.
 """
 
 import json
+import re
 import pytest
 from pathlib import Path
 from urllib.parse import urlparse
 
+PROJECT_ROOT = Path(__file__).parent.parent
+SCRIPTS_DIR = PROJECT_ROOT / "scripts"
+SHA256_HEX_RE = re.compile(r'[0-9a-fA-F]{64}')
+EXPECTED_CATEGORIES = frozenset((
+    'checkpoints', 'unet', 'vae', 'clip', 't5', 'clip_vision',
+    'controlnet', 'loras', 'upscale_models', 'diffusion_models',
+    'animatediff_models', 'text_encoders', 'ipadapter', 't2i_adapter',
+    'animatediff', 'video_models', 'flux_gguf', 'sd35_gguf', 'wan_gguf',
+    'inpainting', 'style_models',
+))
 
-@pytest.fixture
+
+@pytest.fixture(scope="module")
 def models_json_path():
     """Path to models_download.json file."""
-    return Path(__file__).parent.parent / "models_download.json"
+    return PROJECT_ROOT / "models_download.json"
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def models_data(models_json_path):
-    """Load models_download.json data."""
-    with open(models_json_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """Load models_download.json data once for all tests in this module."""
+    return json.loads(models_json_path.read_bytes())
+
+
+@pytest.fixture(scope="module")
+def model_urls(models_data):
+    """(category, url, parsed url) for every model entry, walked and parsed once."""
+    entries = []
+    for category, items in models_data.items():
+        for item in items:
+            if isinstance(item, str):
+                url = item
+            elif isinstance(item, dict):
+                url = item.get('url', '')
+            else:
+                continue
+            entries.append((category, url, urlparse(url)))
+    return entries
 
 
 def test_models_json_exists(models_json_path):
@@ -36,78 +63,46 @@ def test_models_json_valid_structure(models_data):
         assert isinstance(items, list), f"Category '{category}' must be a list"
 
 
-def test_all_urls_are_https(models_data):
+def test_all_urls_are_https(model_urls):
     """Test that all model URLs use HTTPS protocol."""
-    http_urls = []
-    
-    for category, items in models_data.items():
-        for item in items:
-            if isinstance(item, str):
-                url = item
-            elif isinstance(item, dict):
-                url = item.get('url', '')
-            else:
-                continue
-            
-            parsed = urlparse(url)
-            if parsed.scheme == 'http':
-                http_urls.append(f"{category}: {url}")
+    http_urls = [
+        f"{category}: {url}" for category, url, parsed in model_urls if parsed.scheme == 'http'
+    ]
     
     assert len(http_urls) == 0, f"Found HTTP URLs (should be HTTPS):\n" + "\n".join(http_urls)
 
 
-def test_all_urls_valid_format(models_data):
+def test_all_urls_valid_format(models_data, model_urls):
     """Test that all URLs have valid format."""
-    invalid_urls = []
-    
-    for category, items in models_data.items():
-        for item in items:
-            if isinstance(item, str):
-                url = item
-            elif isinstance(item, dict):
-                url = item.get('url', '')
-            else:
-                invalid_urls.append(f"{category}: Invalid item type {type(item)}")
-                continue
-            
-            parsed = urlparse(url)
-            if not parsed.scheme or not parsed.netloc:
-                invalid_urls.append(f"{category}: {url}")
+    invalid_urls = [
+        f"{category}: Invalid item type {type(item)}"
+        for category, items in models_data.items()
+        for item in items
+        if not isinstance(item, (str, dict))
+    ]
+    invalid_urls += [
+        f"{category}: {url}"
+        for category, url, parsed in model_urls
+        if not parsed.scheme or not parsed.netloc
+    ]
     
     assert len(invalid_urls) == 0, f"Found invalid URLs:\n" + "\n".join(invalid_urls)
 
 
 def test_model_categorization(models_data):
     """Test that all models have a category."""
-    expected_categories = [
-        'checkpoints', 'unet', 'vae', 'clip', 't5', 'clip_vision',
-        'controlnet', 'loras', 'upscale_models', 'diffusion_models',
-        'animatediff_models', 'text_encoders', 'ipadapter', 't2i_adapter',
-        'animatediff', 'video_models', 'flux_gguf', 'sd35_gguf', 'wan_gguf',
-        'inpainting', 'style_models'
-    ]
-    
     for category in models_data.keys():
-        assert category in expected_categories, f"Unknown category: {category}"
+        assert category in EXPECTED_CATEGORIES, f"Unknown category: {category}"
 
 
-def test_huggingface_urls_format(models_data):
+def test_huggingface_urls_format(model_urls):
     """Test that Hugging Face URLs use the correct format."""
-    invalid_hf_urls = []
-    
-    for category, items in models_data.items():
-        for item in items:
-            if isinstance(item, str):
-                url = item
-            elif isinstance(item, dict):
-                url = item.get('url', '')
-            else:
-                continue
-            
-            if 'huggingface.co' in url:
-                # HF URLs should use /resolve/ not /blob/
-                if '/blob/' in url:
-                    invalid_hf_urls.append(f"{category}: {url}")
+    # HF URLs should use /resolve/ not /blob/
+    invalid_hf_urls = [
+        f"{category}: {url}"
+        for category, url, _ in model_urls
+        if 'huggingface.co' in url and '/blob/' in url
+    ]
     
     assert len(invalid_hf_urls) == 0, f"Found HF URLs with /blob/ (should use /resolve/):\n" + "\n".join(invalid_hf_urls)
 
@@ -124,30 +119,22 @@ def test_checksum_format_if_present(models_data):
                     # SHA256 should be 64 hex characters
                     if not isinstance(checksum, str) or len(checksum) != 64:
                         invalid_checksums.append(f"{category}: {item.get('url', 'unknown')} - invalid checksum length")
-                    elif not all(c in '0123456789abcdefABCDEF' for c in checksum):
+                    elif not SHA256_HEX_RE.fullmatch(checksum):
                         invalid_checksums.append(f"{category}: {item.get('url', 'unknown')} - invalid checksum format")
     
     assert len(invalid_checksums) == 0, f"Found invalid checksums:\n" + "\n".join(invalid_checksums)
 
 
-def test_no_duplicate_urls(models_data):
+def test_no_duplicate_urls(model_urls):
     """Test that there are no duplicate URLs across all categories."""
     seen_urls = {}
     duplicates = []
     
-    for category, items in models_data.items():
-        for item in items:
-            if isinstance(item, str):
-                url = item
-            elif isinstance(item, dict):
-                url = item.get('url', '')
-            else:
-                continue
-            
-            if url in seen_urls:
-                duplicates.append(f"URL appears in both '{seen_urls[url]}' and '{category}': {url}")
-            else:
-                seen_urls[url] = category
+    for category, url, _ in model_urls:
+        if url in seen_urls:
+            duplicates.append(f"URL appears in both '{seen_urls[url]}' and '{category}': {url}")
+        else:
+            seen_urls[url] = category
     
     assert len(duplicates) == 0, f"Found duplicate URLs:\n" + "\n".join(duplicates)
 
@@ -172,53 +159,64 @@ def test_category_not_empty(models_data):
         assert len(models_data[category]) > 0, f"Category '{category}' is empty"
 
 
+@pytest.fixture(scope="module")
+def download_models():
+    """scripts/download_models.py loaded once by file path, without touching sys.path."""
+    import importlib.util
+    
+    spec = importlib.util.spec_from_file_location("download_models", SCRIPTS_DIR / "download_models.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
 @pytest.mark.slow
-def test_download_single_model_structure():
+def test_download_single_model_structure(download_models):
     """Test that download_models.py can be imported and has expected structure."""
-    import sys
-    from pathlib import Path
-    
-    # Add scripts directory to path
-    scripts_dir = Path(__file__).parent.parent / "scripts"
-    sys.path.insert(0, str(scripts_dir))
-    
-    try:
-        import download_models
-        
-        # Check for expected classes and functions
-        assert hasattr(download_models, 'ComfyUIModelDownloader'), "ComfyUIModelDownloader class not found"
-        assert hasattr(download_models, 'verify_checksum'), "verify_checksum function not found"
-        assert hasattr(download_models, 'setup_hf_session'), "setup_hf_session function not found"
-        
-    finally:
-        sys.path.pop(0)
+    # Check for expected classes and functions
+    assert hasattr(download_models, 'ComfyUIModelDownloader'), "ComfyUIModelDownloader class not found"
+    assert hasattr(download_models, 'verify_checksum'), "verify_checksum function not found"
+    assert hasattr(download_models, 'setup_hf_session'), "setup_hf_session function not found"
 
 
 def test_verification_script_exists():
     """Test that verify_links.py script exists."""
-    verify_script = Path(__file__).parent.parent / "scripts" / "verify_links.py"
+    verify_script = SCRIPTS_DIR / "verify_links.py"
     assert verify_script.exists(), "verify_links.py script not found"
 
 
-def test_model_classification_mapping():
+def test_model_classification_mapping(download_models):
     """Test model classification mapping is comprehensive."""
-    import sys
-    from pathlib import Path
-    
-    scripts_dir = Path(__file__).parent.parent / "scripts"
-    sys.path.insert(0, str(scripts_dir))
-    
-    try:
-        import download_models
-        
-        mapping = download_models.MODEL_CLASSIFICATION_MAPPING
-        
-        # Should have entries for common model types
-        directories = [item[0] for item in mapping]
-        
-        assert 'checkpoints' in directories, "checkpoints not in classification mapping"
-        assert 'vae' in directories, "vae not in classification mapping"
-        assert 'loras' in directories, "loras not in classification mapping"
-        
-    finally:
-        sys.path.pop(0)
+    mapping = download_models.MODEL_CLASSIFICATION_MAPPING
+    
+    # Should have entries for common model types
+    directories = [item[0] for item in mapping]
+    
+    assert 'checkpoints' in directories, "checkpoints not in classification mapping"
+    assert 'vae' in directories, "vae not in classification mapping"
+    assert 'loras' in directories, "loras not in classification mapping"
+
+
+def test_model_classification_priority(download_models):
+    """Test that filenames land in the most specific matching directory."""
+    expected = {
+        "flux1-dev.safetensors": "unet",
+        "flux_vae.safetensors": "unet",  # unet patterns are checked before vae
+        "sdxl_vae.safetensors": "vae",
+        "clip_vision_g.safetensors": "clip_vision",
+        "clip_l.safetensors": "clip",
+        "control_v11p_sd15_canny.pth": "controlnet",
+        "detail_tweaker.lora": "loras",
+        "4x-UltraSharp.pth": "upscale_models",
+        "mm_sd_v15_v2.ckpt": "animatediff_models",
+        "model.ckpt": "checkpoints",
+        "sd_xl_base_1.0.safetensors": "checkpoints",
+        "model.safetensors.part": "diffusion_models",
+        "unknown.bin": "diffusion_models",
+    }
+    
+    for filename, directory in expected.items():
+        assert download_models.classify_model_file(filename) == directory, filename
+    
+    url = "https://huggingface.co/org/repo/resolve/main/sdxl_vae.safetensors?download=true"
+    assert download_models.filename_from_url(url) == "sdxl_vae.safetensors"
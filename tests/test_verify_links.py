@@ -0,0 +1,128 @@
+"""
+Tests for the link verifier's result cache and ETag revalidation.
+"""
+
+import importlib.util
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+SCRIPTS_DIR = PROJECT_ROOT / "scripts"
+LINK = "https://huggingface.co/org/repo/resolve/main/model.safetensors"
+ETAG = '"abc123"'
+
+
+class FakeResponse:
+    """Just enough of requests.Response for check_link."""
+
+    def __init__(self, url, status_code, headers=None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class FakeSession:
+    """Records GETs; answers 304 when If-None-Match carries ETAG, else 206 with ETAG."""
+
+    def __init__(self):
+        self.gets = []
+
+    def get(self, url, headers=None, **kwargs):
+        headers = headers or {}
+        self.gets.append((url, headers))
+        if headers.get("If-None-Match") == ETAG:
+            return FakeResponse(url, 304)
+        return FakeResponse(url, 206, {"ETag": ETAG})
+
+    def head(self, url, **kwargs):
+        return FakeResponse(url, 200)
+
+
+@pytest.fixture
+def verify_links(tmp_path, monkeypatch):
+    """
+    verify_links.py loaded with its cache and results files below tmp_path.
+
+    The module is loaded per test because the cache path is resolved at import time.
+    """
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("MAX_WORKERS", "1")
+    monkeypatch.delenv("LINK_CACHE_TTL", raising=False)
+    spec = importlib.util.spec_from_file_location("verify_links", SCRIPTS_DIR / "verify_links.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    # Results are written next to the script's parent, so point __file__ into tmp_path
+    (tmp_path / "scripts").mkdir()
+    (tmp_path / "models_download.json").write_text(json.dumps({"checkpoints": [LINK]}))
+    monkeypatch.setattr(module, "__file__", str(tmp_path / "scripts" / "verify_links.py"))
+    monkeypatch.setattr(module, "extract_links_from_json", lambda path: [LINK])
+    monkeypatch.setattr(module, "SESSION", FakeSession())
+    return module
+
+
+def write_cache(module, age):
+    """Store LINK as valid with ETAG, checked age seconds ago."""
+    module.save_link_cache({
+        LINK: {
+            "status_code": 206,
+            "final_url": LINK,
+            "etag": ETAG,
+            "timestamp": time.time() - age,
+        }
+    })
+
+
+def run_main(module, monkeypatch, *args):
+    """Run main() with the given arguments and return the saved results."""
+    monkeypatch.setattr(sys, "argv", ["verify_links.py", *args])
+    with pytest.raises(SystemExit) as exit_info:
+        module.main()
+    assert exit_info.value.code == 0
+    results_file = Path(module.__file__).parent.parent / "link_verification_results.json"
+    return json.loads(results_file.read_text())
+
+
+def test_fresh_cache_entry_skips_request(verify_links, monkeypatch):
+    """A link found valid within the TTL is reported valid without a request."""
+    write_cache(verify_links, age=60)
+
+    results = run_main(verify_links, monkeypatch)
+
+    assert verify_links.SESSION.gets == []
+    assert results["stats"]["valid"] == 1
+
+
+def test_expired_cache_entry_revalidates_with_etag(verify_links, monkeypatch):
+    """An expired entry is re-checked with If-None-Match, and a 304 counts as valid."""
+    write_cache(verify_links, age=verify_links.DEFAULT_LINK_CACHE_TTL + 60)
+
+    results = run_main(verify_links, monkeypatch)
+
+    assert [headers.get("If-None-Match") for _, headers in verify_links.SESSION.gets] == [ETAG]
+    assert results["stats"]["valid"] == 1
+    assert results["valid_links"] == [LINK]
+    entry = verify_links.load_link_cache()[LINK]
+    assert entry["status_code"] == 304
+    assert entry["etag"] == ETAG
+    assert entry["timestamp"] > time.time() - 60
+
+
+def test_no_cache_rechecks_every_link(verify_links, monkeypatch):
+    """--no-cache ignores fresh entries and sends unconditional requests."""
+    write_cache(verify_links, age=60)
+
+    results = run_main(verify_links, monkeypatch, "--no-cache")
+
+    assert [headers.get("If-None-Match") for _, headers in verify_links.SESSION.gets] == [None]
+    assert results["stats"]["valid"] == 1